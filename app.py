@@ -1,13 +1,17 @@
+import os
+
 import streamlit as st
-import pandas as pd
-import numpy as np
-import joblib
-import plotly.graph_objects as go
-import plotly.express as px
-from pathlib import Path
-from datetime import datetime
-import io
-import base64
+
+from app_assets import CUSTOM_CSS, FOOTER_HTML, SIDEBAR_MARKDOWN, template_download_html
+from instrumentation import BUCKETS, disable, enable, is_enabled, prometheus_text, snapshot, span
+from serving import get_scorer, predict_one, score_frame
+from upload_cache import UploadCache, content_key, parse_csv
+
+# pandas, plotly and scikit-learn are imported inside the modes that use them,
+# so a cold process serving manual rule-based predictions never loads them.
+
+# The profiling toggle and stage table are only shown when the app is started with HEART_ADMIN=1
+ADMIN = os.environ.get('HEART_ADMIN', '').strip() == '1'
 
 # ----------------------------
 # Page Config
@@ -22,113 +26,7 @@ st.set_page_config(
 # ----------------------------
 # Custom CSS for Beautiful Design
 # ----------------------------
-st.markdown("""
-    <style>
-    /* Main container styling */
-    .main {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-    }
-    
-    .stApp {
-        background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
-    }
-    
-    /* Custom card component */
-    .risk-card {
-        background: linear-gradient(135deg, rgba(255,255,255,0.1), rgba(255,255,255,0.05));
-        backdrop-filter: blur(10px);
-        border-radius: 20px;
-        padding: 1.5rem;
-        border: 1px solid rgba(255,255,255,0.2);
-        box-shadow: 0 8px 32px 0 rgba(31, 38, 135, 0.37);
-        margin: 1rem 0;
-        transition: transform 0.3s;
-    }
-    
-    .risk-card:hover {
-        transform: translateY(-5px);
-    }
-    
-    /* Input mode selector styling */
-    .mode-selector {
-        background: rgba(255,255,255,0.05);
-        border-radius: 15px;
-        padding: 1rem;
-        margin-bottom: 1rem;
-    }
-    
-    /* Button styling */
-    .stButton > button {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        border-radius: 50px;
-        padding: 0.75rem 2rem;
-        font-weight: 600;
-        font-size: 1rem;
-        transition: all 0.3s;
-        width: 100%;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 10px 20px rgba(0,0,0,0.2);
-        background: linear-gradient(135deg, #764ba2 0%, #667eea 100%);
-    }
-    
-    /* File uploader styling */
-    .uploadedFile {
-        background: rgba(255,255,255,0.1);
-        border-radius: 10px;
-        padding: 1rem;
-        border: 2px dashed #667eea;
-    }
-    
-    /* Dataframe styling */
-    .dataframe {
-        background: rgba(255,255,255,0.05);
-        border-radius: 10px;
-        color: white;
-    }
-    
-    .dataframe th {
-        background: rgba(102, 126, 234, 0.3);
-        color: white;
-    }
-    
-    /* Success/Error message styling */
-    .stAlert {
-        border-radius: 15px;
-        border-left: 5px solid;
-    }
-    
-    h1, h2, h3, h4, h5, h6 {
-        background: linear-gradient(135deg, #fff 0%, #a8c0ff 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-        font-weight: 700;
-    }
-    
-    /* Tab styling */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 2rem;
-        background: rgba(0,0,0,0.2);
-        border-radius: 10px;
-        padding: 0.5rem;
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        border-radius: 10px;
-        padding: 0.5rem 1rem;
-        color: white;
-    }
-    
-    .stTabs [aria-selected="true"] {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-    }
-    </style>
-""", unsafe_allow_html=True)
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 # ----------------------------
 # Sidebar Information
@@ -136,43 +34,15 @@ st.markdown("""
 with st.sidebar:
     st.image("https://img.icons8.com/fluency/96/000000/heart-with-pulse.png", width=80)
     st.title("ℹ️ About CardioIntel")
-    st.markdown("""
-    ### 🤖 AI-Powered Diagnosis
-    
-    Advanced heart disease risk prediction using **Machine Learning** algorithms trained on clinical data.
-    
-    ---
-    ### 📊 How to Use
-    
-    **Option 1: Manual Input**
-    - Fill patient data manually
-    - Real-time prediction
-    
-    **Option 2: Batch Upload**
-    - Upload CSV file
-    - Process multiple patients
-    - Download results
-    
-    ---
-    ### 📁 CSV Format Required
-    
-    Columns needed:
-    - age, sex, cp, trestbps, chol
-    - fbs, restecg, thalach, exang
-    - oldpeak, slope, ca, thal
-    
-    ---
-    ### 🎯 Model Accuracy
-    
-    - Accuracy: **87-92%**
-    - Sensitivity: **89%**
-    - Specificity: **85%**
-    
-    ---
-    ### ⚠️ Disclaimer
-    
-    This tool is for **educational purposes** only. Always consult healthcare professionals for medical decisions.
-    """)
+    st.markdown(SIDEBAR_MARKDOWN)
+
+    # Admin: stage profiling can be switched on at runtime (or with HEART_PROFILE=1)
+    if ADMIN:
+        st.markdown("---")
+        profiling = st.toggle("🛠️ Admin: record stage timings", value=is_enabled(),
+                              help="Times pipeline stages, scoring and chart rendering; near-zero overhead when off")
+        if profiling != is_enabled():
+            enable() if profiling else disable()
 
 # ----------------------------
 # Main Title
@@ -196,124 +66,37 @@ input_mode = st.radio(
 )
 
 # ----------------------------
-# Define Prediction Function
+# Scoring Engine Selection
 # ----------------------------
-def predict_risk(features):
-    """
-    Enhanced prediction using clinical scoring system
-    """
-    age, sex, cp, trestbps, chol, fbs, restecg, thalach, exang, oldpeak, slope, ca, thal = features
-    
-    # Clinical risk score calculation
-    risk_score = 0
-    
-    # Age factor
-    if age > 60:
-        risk_score += 2.5
-    elif age > 50:
-        risk_score += 1.5
-    elif age > 40:
-        risk_score += 0.8
-    
-    # Sex factor
-    if sex == 1:
-        risk_score += 0.7
-    
-    # Chest pain type
-    if cp == 3:
-        risk_score += 2.0
-    elif cp == 2:
-        risk_score += 0.8
-    elif cp == 1:
-        risk_score += 0.3
-    
-    # Blood pressure
-    if trestbps > 140:
-        risk_score += 1.2
-    elif trestbps > 130:
-        risk_score += 0.6
-    
-    # Cholesterol
-    if chol > 280:
-        risk_score += 1.3
-    elif chol > 240:
-        risk_score += 0.7
-    
-    # Fasting blood sugar
-    if fbs == 1:
-        risk_score += 0.8
-    
-    # Resting ECG
-    if restecg == 2:
-        risk_score += 1.0
-    elif restecg == 1:
-        risk_score += 0.5
-    
-    # Max heart rate
-    if thalach < 100:
-        risk_score += 2.0
-    elif thalach < 120:
-        risk_score += 1.2
-    elif thalach < 140:
-        risk_score += 0.6
-    
-    # Exercise angina
-    if exang == 1:
-        risk_score += 1.5
-    
-    # Oldpeak
-    if oldpeak > 2.0:
-        risk_score += 1.8
-    elif oldpeak > 1.5:
-        risk_score += 1.2
-    elif oldpeak > 1.0:
-        risk_score += 0.6
-    
-    # Slope
-    if slope == 2:
-        risk_score += 1.2
-    elif slope == 1:
-        risk_score += 0.5
-    
-    # Vessels
-    if ca == 3:
-        risk_score += 1.8
-    elif ca == 2:
-        risk_score += 1.0
-    elif ca == 1:
-        risk_score += 0.5
-    
-    # Thalassemia
-    if thal == 3:
-        risk_score += 1.5
-    elif thal == 2:
-        risk_score += 0.7
-    
-    # Normalize to probability
-    probability = min(95, max(5, (risk_score / 15) * 100))
-    
-    # Determine class
-    prediction = 1 if probability >= 50 else 0
-    
-    return prediction, probability
+@st.cache_resource
+def get_upload_cache():
+    """One cache per process, so sessions uploading the same file share parsing and scoring"""
+    return UploadCache()
+
+upload_cache = get_upload_cache()
+
+engine_label = st.radio(
+    "Choose the scoring engine:",
+    ["🧮 Clinical Rules", "🤖 Trained Model"],
+    horizontal=True,
+    help="Clinical rules use the built-in risk score; the trained model serves models/final_model.pkl"
+)
+engine = 'model' if engine_label == "🤖 Trained Model" else 'rules'
+
+# serving keeps one scorer per model file for the process and reloads it when the file changes,
+# so it is not wrapped in st.cache_resource, which would pin the first one loaded
+try:
+    with st.spinner("Loading scoring engine..."):
+        scorer = get_scorer(engine)
+except Exception as e:
+    st.warning(f"⚠️ {e}. Falling back to clinical rules.")
+    scorer = get_scorer('rules')
 
-def predict_batch(df):
-    """Predict for multiple patients"""
-    results = []
-    for idx, row in df.iterrows():
-        features = [
-            row['age'], row['sex'], row['cp'], row['trestbps'],
-            row['chol'], row['fbs'], row['restecg'], row['thalach'],
-            row['exang'], row['oldpeak'], row['slope'], row['ca'], row['thal']
-        ]
-        pred, prob = predict_risk(features)
-        results.append({
-            'Patient_ID': idx + 1,
-            'Risk_Probability': round(prob, 2),
-            'Risk_Class': 'High Risk' if pred == 1 else 'Low Risk',
-            'Recommendation': 'Consult Cardiologist Immediately' if pred == 1 else 'Maintain Healthy Lifestyle'
-        })
-    return pd.DataFrame(results)
+def show_timing(seconds, n_patients=1):
+    st.caption(
+        f"⏱️ Engine: **{scorer.name}** | Load time: {scorer.load_seconds * 1000:.1f} ms | "
+        f"Prediction: {seconds * 1000:.2f} ms ({seconds * 1e6 / max(n_patients, 1):.1f} µs/patient)"
+    )
 
 # ----------------------------
 # Option 1: Manual Input
@@ -399,33 +182,37 @@ if input_mode == "✍️ Manual Input":
     # Display results
     if predict_button:
         features = [age, sex, cp, trestbps, chol, fbs, restecg, thalach, exang, oldpeak, slope, ca, thal]
-        prediction, probability = predict_risk(features)
+        prediction, probability, latency = predict_one(scorer, features)
         
         # Display results (same as before)
         st.markdown("## 📊 Diagnosis Results")
+        show_timing(latency)
         
         col_result_left, col_result_right = st.columns([1, 1])
         
         with col_result_left:
-            fig = go.Figure(go.Indicator(
-                mode="gauge+number+delta",
-                value=probability,
-                domain={'x': [0, 1], 'y': [0, 1]},
-                title={'text': "Risk Probability", 'font': {'size': 24, 'color': 'white'}},
-                delta={'reference': 50},
-                gauge={
-                    'axis': {'range': [0, 100], 'tickcolor': "white"},
-                    'bar': {'color': "darkblue"},
-                    'steps': [
-                        {'range': [0, 30], 'color': 'rgba(34, 197, 94, 0.3)'},
-                        {'range': [30, 50], 'color': 'rgba(234, 179, 8, 0.3)'},
-                        {'range': [50, 70], 'color': 'rgba(249, 115, 22, 0.3)'},
-                        {'range': [70, 100], 'color': 'rgba(239, 68, 68, 0.3)'}
-                    ]
-                }
-            ))
-            fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font={'color': "white"}, height=300)
-            st.plotly_chart(fig, use_container_width=True)
+            import plotly.graph_objects as go
+
+            with span('app.render_gauge'):
+                fig = go.Figure(go.Indicator(
+                    mode="gauge+number+delta",
+                    value=probability,
+                    domain={'x': [0, 1], 'y': [0, 1]},
+                    title={'text': "Risk Probability", 'font': {'size': 24, 'color': 'white'}},
+                    delta={'reference': 50},
+                    gauge={
+                        'axis': {'range': [0, 100], 'tickcolor': "white"},
+                        'bar': {'color': "darkblue"},
+                        'steps': [
+                            {'range': [0, 30], 'color': 'rgba(34, 197, 94, 0.3)'},
+                            {'range': [30, 50], 'color': 'rgba(234, 179, 8, 0.3)'},
+                            {'range': [50, 70], 'color': 'rgba(249, 115, 22, 0.3)'},
+                            {'range': [70, 100], 'color': 'rgba(239, 68, 68, 0.3)'}
+                        ]
+                    }
+                ))
+                fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font={'color': "white"}, height=300)
+                st.plotly_chart(fig, use_container_width=True)
         
         with col_result_right:
             if prediction == 1:
@@ -439,33 +226,17 @@ if input_mode == "✍️ Manual Input":
 # Option 2: Upload CSV File
 # ----------------------------
 elif input_mode == "📁 Upload CSV File":
+    import plotly.express as px
+    from explain import DEFAULT_TOP_FACTORS, ExplanationUnavailable
+    from export import EXPORT_FORMATS, export_file
+    from streaming import OutputFile, score_csv
+
     st.markdown("## 📂 Upload Patient Data File")
     
     # Template download
     st.info("📋 **Don't have a CSV file? Download our template to get started!**")
     
-    # Create template DataFrame
-    template_df = pd.DataFrame({
-        'age': [54, 45, 62],
-        'sex': [1, 0, 1],
-        'cp': [0, 1, 3],
-        'trestbps': [130, 120, 145],
-        'chol': [240, 200, 280],
-        'fbs': [0, 0, 1],
-        'restecg': [0, 1, 2],
-        'thalach': [150, 165, 120],
-        'exang': [0, 0, 1],
-        'oldpeak': [1.2, 0.5, 2.5],
-        'slope': [1, 0, 2],
-        'ca': [0, 0, 2],
-        'thal': [2, 1, 3]
-    })
-    
-    # Convert to CSV for download
-    csv = template_df.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()
-    href = f'<a href="data:file/csv;base64,{b64}" download="heart_disease_template.csv" style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 10px 20px; border-radius: 10px; text-decoration: none; display: inline-block; margin: 10px 0;">📥 Download CSV Template</a>'
-    st.markdown(href, unsafe_allow_html=True)
+    st.markdown(template_download_html(), unsafe_allow_html=True)
     
     st.markdown("---")
     
@@ -475,21 +246,70 @@ elif input_mode == "📁 Upload CSV File":
         type=['csv'],
         help="Upload CSV file with columns: age, sex, cp, trestbps, chol, fbs, restecg, thalach, exang, oldpeak, slope, ca, thal"
     )
-    
-    if uploaded_file is not None:
+
+    stream_mode = st.checkbox(
+        "⚡ Stream large file (constant memory)",
+        help="Score the file in fixed-size chunks and write results straight to disk instead of holding them in memory"
+    )
+
+    if uploaded_file is not None and stream_mode:
+        if st.button("🔍 **STREAM ANALYZE**", use_container_width=True):
+            progress = st.empty()
+
+            def show_totals(totals):
+                progress.markdown(f"""
+                <div class='risk-card'>
+                    <h4>Running Totals ({totals.chunks} chunks)</h4>
+                    <p>📊 Patients Scored: <strong>{totals.count}</strong></p>
+                    <p>🔴 High Risk: <strong>{totals.high_risk}</strong> | 🟢 Low Risk: <strong>{totals.low_risk}</strong></p>
+                    <p>📅 Avg Age: <strong>{totals.mean_age:.1f}</strong> | 🩸 Avg Cholesterol: <strong>{totals.mean_chol:.0f}</strong></p>
+                    <p>⚠️ Invalid Rows Skipped: <strong>{totals.invalid}</strong></p>
+                </div>
+                """, unsafe_allow_html=True)
+
+            # One private file per session: the previous run's file goes when it is replaced, and the
+            # last one when the session state (and with it the OutputFile) is dropped
+            previous_output = st.session_state.pop('stream_output', None)
+            if previous_output is not None:
+                previous_output.remove()
+            stream_output = st.session_state['stream_output'] = OutputFile()
+            output_path = stream_output.path
+            try:
+                totals = score_csv(uploaded_file, output_path, on_chunk=show_totals, scorer=scorer)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+            else:
+                st.success(f"✅ Scored {totals.count} patient records")
+                st.download_button("📥 Download Results CSV", data=output_path.read_bytes,
+                                   file_name="heart_disease_predictions.csv", mime="text/csv",
+                                   on_click='ignore')
+
+    elif uploaded_file is not None:
         try:
-            # Read the file
-            df = pd.read_csv(uploaded_file)
-            
-            # Validate columns
-            required_columns = ['age', 'sex', 'cp', 'trestbps', 'chol', 'fbs', 'restecg', 
-                               'thalach', 'exang', 'oldpeak', 'slope', 'ca', 'thal']
-            
-            missing_cols = [col for col in required_columns if col not in df.columns]
+            # Hash each upload once per session; reruns look the key up by file id
+            upload_keys = st.session_state.setdefault('upload_keys', {})
+            if uploaded_file.file_id not in upload_keys:
+                upload_keys[uploaded_file.file_id] = content_key(uploaded_file.getvalue())
+            upload_key = upload_keys[uploaded_file.file_id]
+
+            # Typed parse, validation and statistics are cached by content
+            upload = upload_cache.get_upload(upload_key, lambda: parse_csv(uploaded_file.getvalue()))
+            df = upload.frame
+            missing_cols = upload.missing_cols
             
+            if not missing_cols and len(upload.errors):
+                n_skipped = upload.n_rows - len(df)
+                st.warning(f"⚠️ {n_skipped} of {upload.n_rows} rows have invalid values and will be skipped")
+                with st.expander(f"View {len(upload.errors)} validation errors"):
+                    errors = upload.errors.rename(columns={'row': 'Patient_ID'})
+                    errors['Patient_ID'] += 1
+                    st.dataframe(errors.head(1000), use_container_width=True, hide_index=True)
+
             if missing_cols:
                 st.error(f"❌ Missing columns: {', '.join(missing_cols)}")
                 st.info("Please make sure your CSV contains all required columns. Download the template for reference.")
+            elif df.empty:
+                st.error("❌ No valid patient records found. Download the template for reference.")
             else:
                 st.success(f"✅ File loaded successfully! Found {len(df)} patient records")
                 
@@ -500,19 +320,37 @@ elif input_mode == "📁 Upload CSV File":
                 # Basic statistics
                 st.markdown("### 📈 Data Statistics")
                 col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
+                stats = upload.stats
                 with col_stat1:
-                    st.metric("Total Patients", len(df))
+                    st.metric("Total Patients", stats['patients'])
                 with col_stat2:
-                    st.metric("Avg Age", f"{df['age'].mean():.1f}")
+                    st.metric("Avg Age", f"{stats['mean_age']:.1f}")
                 with col_stat3:
-                    st.metric("Avg Cholesterol", f"{df['chol'].mean():.0f}")
+                    st.metric("Avg Cholesterol", f"{stats['mean_chol']:.0f}")
                 with col_stat4:
-                    st.metric("Males/Females", f"{df['sex'].sum()}/{len(df)-df['sex'].sum()}")
+                    st.metric("Males/Females", f"{stats['males']}/{stats['females']}")
                 
-                # Predict button for batch
+                # Predict button for batch; results stay on screen across reruns once requested
+                analyzed_uploads = st.session_state.setdefault('analyzed_uploads', set())
+                show_factors = st.checkbox(
+                    "🧭 Show top risk factors",
+                    help="Add each patient's three largest contributions to the results and download "
+                         "(rule points or model attributions)"
+                )
                 if st.button("🔍 **ANALYZE ALL PATIENTS**", use_container_width=True):
+                    analyzed_uploads.add(upload_key)
+                if upload_key in analyzed_uploads:
                     with st.spinner("Analyzing patient data..."):
-                        results_df = predict_batch(df)
+                        top_factors = DEFAULT_TOP_FACTORS if show_factors else 0
+                        results_version = f"{scorer.version}:factors{top_factors}"
+                        try:
+                            results_df, summary, latency = upload_cache.get_results(
+                                upload_key, results_version, lambda: score_frame(scorer, df, top_factors)[0])
+                        except ExplanationUnavailable as e:
+                            st.warning(f"⚠️ Risk factors unavailable for this model: {e}")
+                            results_df, summary, latency = upload_cache.get_results(
+                                upload_key, f"{scorer.version}:factors0", lambda: score_frame(scorer, df)[0])
+                        show_timing(latency, len(df))
                         
                         # Display results
                         st.markdown("### 📋 Prediction Results")
@@ -520,18 +358,19 @@ elif input_mode == "📁 Upload CSV File":
                         
                         # Summary statistics
                         st.markdown("### 📊 Risk Distribution")
-                        risk_dist = results_df['Risk_Class'].value_counts()
+                        risk_dist = summary['risk_distribution']
                         
                         col_risk1, col_risk2 = st.columns(2)
                         with col_risk1:
-                            fig_pie = px.pie(values=risk_dist.values, names=risk_dist.index, 
-                                           title="Risk Distribution", color_discrete_sequence=['#ef4444', '#22c55e'])
-                            fig_pie.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font={'color': 'white'})
-                            st.plotly_chart(fig_pie, use_container_width=True)
+                            with span('app.render_pie'):
+                                fig_pie = px.pie(values=risk_dist.values, names=risk_dist.index, 
+                                               title="Risk Distribution", color_discrete_sequence=['#ef4444', '#22c55e'])
+                                fig_pie.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font={'color': 'white'})
+                                st.plotly_chart(fig_pie, use_container_width=True)
                         
                         with col_risk2:
-                            high_risk_count = len(results_df[results_df['Risk_Class'] == 'High Risk'])
-                            low_risk_count = len(results_df[results_df['Risk_Class'] == 'Low Risk'])
+                            high_risk_count = summary['high_risk']
+                            low_risk_count = summary['low_risk']
                             st.markdown(f"""
                             <div class='risk-card'>
                                 <h4>Summary Report</h4>
@@ -541,11 +380,18 @@ elif input_mode == "📁 Upload CSV File":
                             </div>
                             """, unsafe_allow_html=True)
                         
-                        # Download results
-                        csv_results = results_df.to_csv(index=False)
-                        b64_results = base64.b64encode(csv_results.encode()).decode()
-                        href_results = f'<a href="data:file/csv;base64,{b64_results}" download="heart_disease_predictions.csv" style="background: linear-gradient(135deg, #10b981 0%, #059669 100%); color: white; padding: 10px 20px; border-radius: 10px; text-decoration: none; display: inline-block; margin-top: 20px;">📥 Download Results CSV</a>'
-                        st.markdown(href_results, unsafe_allow_html=True)
+                        # Download results; the file is only encoded when the button is clicked, chunk by
+                        # chunk into this session's private file, which is deleted with the session
+                        export_format = st.selectbox("Download format", list(EXPORT_FORMATS),
+                                                     format_func=lambda fmt: EXPORT_FORMATS[fmt][0])
+                        format_label, format_mime, format_suffix = EXPORT_FORMATS[export_format]
+                        if 'results_export' not in st.session_state:
+                            st.session_state['results_export'] = OutputFile()
+                        export_path = st.session_state['results_export'].path
+                        st.download_button(f"📥 Download Results ({format_label})",
+                                           data=lambda: export_file(results_df, export_format, export_path).read_bytes(),
+                                           file_name=f"heart_disease_predictions{format_suffix}",
+                                           mime=format_mime, on_click='ignore')
                         
         except Exception as e:
             st.error(f"Error reading file: {str(e)}")
@@ -570,23 +416,44 @@ else:
     """, unsafe_allow_html=True)
     
     # Sample visualization
+    import plotly.express as px
+
     st.markdown("### 📊 Example Analysis Dashboard")
-    sample_data = pd.DataFrame({
+    sample_data = {
         'Age Group': ['20-40', '41-50', '51-60', '61-70', '70+'],
         'Risk Percentage': [15, 25, 45, 65, 78]
-    })
+    }
     
-    fig = px.bar(sample_data, x='Age Group', y='Risk Percentage', 
-                 title='Risk Percentage by Age Group',
-                 color='Risk Percentage', color_continuous_scale='RdYlGn_r')
-    fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font={'color': 'white'})
-    st.plotly_chart(fig, use_container_width=True)
+    with span('app.render_bar'):
+        fig = px.bar(sample_data, x='Age Group', y='Risk Percentage', 
+                     title='Risk Percentage by Age Group',
+                     color='Risk Percentage', color_continuous_scale='RdYlGn_r')
+        fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font={'color': 'white'})
+        st.plotly_chart(fig, use_container_width=True)
 
 # ----------------------------
 # Footer
 # ----------------------------
 st.markdown("---")
-st.markdown(
-    "<p style='text-align: center; color: gray;'>Made with ❤️ using AI & Streamlit | Clinical Decision Support Tool | Version 2.0</p>",
-    unsafe_allow_html=True
-)
+st.markdown(FOOTER_HTML, unsafe_allow_html=True)
+
+# ----------------------------
+# Admin: Stage Profiling
+# ----------------------------
+# Rendered last so the table includes the spans recorded during this run
+if ADMIN and is_enabled():
+    with st.sidebar:
+        st.markdown("### 🛠️ Stage Profiling")
+        stages = snapshot()
+        if not stages:
+            st.caption("No stages recorded yet")
+        else:
+            st.dataframe([{'Stage': name, 'Calls': stats['count'], 'Mean ms': round(stats['mean_s'] * 1000, 2),
+                           'Max ms': round(stats['max_s'] * 1000, 2), 'Total s': round(stats['total_s'], 3)}
+                          for name, stats in sorted(stages.items())], hide_index=True)
+            stage = st.selectbox("Latency histogram", sorted(stages))
+            bucket_labels = [f"≤{bound * 1000:g} ms" if bound != float('inf') else "> 60 s" for bound in BUCKETS]
+            st.bar_chart({'Bucket': bucket_labels, 'Calls': list(stages[stage]['buckets'].values())},
+                         x='Bucket', y='Calls', sort=False)
+            st.download_button("📥 Prometheus metrics", data=prometheus_text, file_name="metrics.prom",
+                               mime="text/plain", on_click='ignore')
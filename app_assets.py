@@ -0,0 +1,183 @@
+# app_assets.py
+from functools import lru_cache
+
+from schema import FEATURE_COLUMNS
+
+# Static page content lives here rather than in app.py: Streamlit re-executes
+# app.py on every interaction, but this module is imported once per process.
+
+CUSTOM_CSS = """
+    <style>
+    /* Main container styling */
+    .main {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    }
+    
+    .stApp {
+        background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
+    }
+    
+    /* Custom card component */
+    .risk-card {
+        background: linear-gradient(135deg, rgba(255,255,255,0.1), rgba(255,255,255,0.05));
+        backdrop-filter: blur(10px);
+        border-radius: 20px;
+        padding: 1.5rem;
+        border: 1px solid rgba(255,255,255,0.2);
+        box-shadow: 0 8px 32px 0 rgba(31, 38, 135, 0.37);
+        margin: 1rem 0;
+        transition: transform 0.3s;
+    }
+    
+    .risk-card:hover {
+        transform: translateY(-5px);
+    }
+    
+    /* Input mode selector styling */
+    .mode-selector {
+        background: rgba(255,255,255,0.05);
+        border-radius: 15px;
+        padding: 1rem;
+        margin-bottom: 1rem;
+    }
+    
+    /* Button styling */
+    .stButton > button {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        color: white;
+        border: none;
+        border-radius: 50px;
+        padding: 0.75rem 2rem;
+        font-weight: 600;
+        font-size: 1rem;
+        transition: all 0.3s;
+        width: 100%;
+    }
+    
+    .stButton > button:hover {
+        transform: translateY(-2px);
+        box-shadow: 0 10px 20px rgba(0,0,0,0.2);
+        background: linear-gradient(135deg, #764ba2 0%, #667eea 100%);
+    }
+    
+    .stDownloadButton > button {
+        background: linear-gradient(135deg, #10b981 0%, #059669 100%);
+        color: white;
+        border: none;
+        border-radius: 10px;
+        padding: 10px 20px;
+    }
+    
+    /* File uploader styling */
+    .uploadedFile {
+        background: rgba(255,255,255,0.1);
+        border-radius: 10px;
+        padding: 1rem;
+        border: 2px dashed #667eea;
+    }
+    
+    /* Dataframe styling */
+    .dataframe {
+        background: rgba(255,255,255,0.05);
+        border-radius: 10px;
+        color: white;
+    }
+    
+    .dataframe th {
+        background: rgba(102, 126, 234, 0.3);
+        color: white;
+    }
+    
+    /* Success/Error message styling */
+    .stAlert {
+        border-radius: 15px;
+        border-left: 5px solid;
+    }
+    
+    h1, h2, h3, h4, h5, h6 {
+        background: linear-gradient(135deg, #fff 0%, #a8c0ff 100%);
+        -webkit-background-clip: text;
+        -webkit-text-fill-color: transparent;
+        background-clip: text;
+        font-weight: 700;
+    }
+    
+    /* Tab styling */
+    .stTabs [data-baseweb="tab-list"] {
+        gap: 2rem;
+        background: rgba(0,0,0,0.2);
+        border-radius: 10px;
+        padding: 0.5rem;
+    }
+    
+    .stTabs [data-baseweb="tab"] {
+        border-radius: 10px;
+        padding: 0.5rem 1rem;
+        color: white;
+    }
+    
+    .stTabs [aria-selected="true"] {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    }
+    </style>
+"""
+
+SIDEBAR_MARKDOWN = """
+    ### 🤖 AI-Powered Diagnosis
+    
+    Advanced heart disease risk prediction using **Machine Learning** algorithms trained on clinical data.
+    
+    ---
+    ### 📊 How to Use
+    
+    **Option 1: Manual Input**
+    - Fill patient data manually
+    - Real-time prediction
+    
+    **Option 2: Batch Upload**
+    - Upload CSV file
+    - Process multiple patients
+    - Download results
+    
+    ---
+    ### 📁 CSV Format Required
+    
+    Columns needed:
+    - age, sex, cp, trestbps, chol
+    - fbs, restecg, thalach, exang
+    - oldpeak, slope, ca, thal
+    
+    ---
+    ### 🎯 Model Accuracy
+    
+    - Accuracy: **87-92%**
+    - Sensitivity: **89%**
+    - Specificity: **85%**
+    
+    ---
+    ### ⚠️ Disclaimer
+    
+    This tool is for **educational purposes** only. Always consult healthcare professionals for medical decisions.
+    """
+
+FOOTER_HTML = "<p style='text-align: center; color: gray;'>Made with ❤️ using AI & Streamlit | Clinical Decision Support Tool | Version 2.0</p>"
+
+TEMPLATE_ROWS = [
+    [54, 1, 0, 130, 240, 0, 0, 150, 0, 1.2, 1, 0, 2],
+    [45, 0, 1, 120, 200, 0, 1, 165, 0, 0.5, 0, 0, 1],
+    [62, 1, 3, 145, 280, 1, 2, 120, 1, 2.5, 2, 2, 3],
+]
+
+
+@lru_cache(maxsize=None)
+def template_csv_bytes():
+    """CSV template for uploads, built without pandas"""
+    lines = [','.join(FEATURE_COLUMNS)] + [','.join(str(value) for value in row) for row in TEMPLATE_ROWS]
+    return ('\n'.join(lines) + '\n').encode()
+
+
+@lru_cache(maxsize=None)
+def template_download_html():
+    import base64
+    b64 = base64.b64encode(template_csv_bytes()).decode()
+    return f'<a href="data:file/csv;base64,{b64}" download="heart_disease_template.csv" style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 10px 20px; border-radius: 10px; text-decoration: none; display: inline-block; margin: 10px 0;">📥 Download CSV Template</a>'
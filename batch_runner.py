@@ -0,0 +1,288 @@
+# batch_runner.py
+import argparse
+import glob
+import io
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+# Files are cut into shards at line boundaries by byte offset, so a worker
+# seeks straight to its rows instead of parsing everything before them. Each
+# worker loads the scoring engine once, in its initializer. Finished shards are
+# written atomically and recorded in manifest.json, so a rerun skips them, and
+# each file's parts are concatenated into one output once all are done.
+
+DEFAULT_SHARD_BYTES = 16 << 20
+MANIFEST_NAME = 'manifest.json'
+SUMMARY_NAME = 'summary.json'
+RESULT_COLUMNS = ['Patient_ID', 'Risk_Probability', 'Risk_Class', 'Recommendation']
+COUNT_BLOCK_BYTES = 16 << 20
+BLANK_BYTES = b' \t\r\n'
+
+_worker_scorer = None
+
+
+def find_inputs(patterns):
+    """CSV files named by paths, directories (their *.csv) or glob patterns, sorted and de-duplicated"""
+    files = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            files += sorted(path.glob('*.csv'))
+        elif path.is_file():
+            files.append(path)
+        else:
+            files += sorted(Path(match) for match in glob.glob(pattern))
+    return list(dict.fromkeys(path.resolve() for path in files))
+
+
+def _parsed_lines(block):
+    import numpy as np
+
+    # Every line of a block that starts on a line boundary, including a final one without a newline
+    data = np.frombuffer(block, dtype=np.uint8)
+    starts = np.concatenate(([0], np.flatnonzero(data == ord('\n')) + 1))
+    ends = np.append(starts[1:] - 1, len(data))
+    # read_csv skips blank and whitespace-only lines; only empty lines or ones opening with
+    # whitespace can be such, so just those are checked one by one
+    first = data[np.minimum(starts, len(data) - 1)]
+    suspects = np.flatnonzero((starts == ends) | np.isin(first, list(BLANK_BYTES)))
+    return len(starts) - sum(not block[starts[i]:ends[i]].strip() for i in suspects)
+
+
+def _count_rows(f, start, end):
+    """Rows read_csv will parse between two line boundaries, so Patient_IDs match streaming.py"""
+    f.seek(start)
+    rows, remaining = 0, end - start
+    while remaining:
+        block = f.read(min(COUNT_BLOCK_BYTES, remaining))
+        if len(block) < remaining:
+            # Finish the line so none is split across blocks; end is a line boundary
+            block += f.readline()
+        rows += _parsed_lines(block)
+        remaining -= len(block)
+    return rows
+
+
+def plan_shards(path, shard_bytes=DEFAULT_SHARD_BYTES):
+    """Split a CSV into row ranges at line boundaries; each shard knows its first row number"""
+    shards = []
+    with open(path, 'rb') as f:
+        f.readline()
+        position = f.tell()
+        size = os.fstat(f.fileno()).st_size
+        first_row = 0
+        while position < size:
+            end = min(position + shard_bytes, size)
+            if end < size:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            rows = _count_rows(f, position, end)
+            shards.append({'index': len(shards), 'start': position, 'end': end, 'first_row': first_row,
+                           'rows': rows, 'done': False})
+            first_row += rows
+            position = end
+    return shards
+
+
+def _init_worker(engine, model_path):
+    global _worker_scorer
+    # One core per process: the pool is the parallelism
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)
+    from serving import DEFAULT_MODEL_PATH, get_scorer
+    _worker_scorer = get_scorer(engine, model_path or DEFAULT_MODEL_PATH)
+
+
+def _score_shard(path, start, end, first_row, part_path):
+    import numpy as np
+    import pandas as pd
+    from schema import FEATURE_COLUMNS
+    from scoring import results_frame
+    from streaming import validate_chunk
+
+    started = time.perf_counter()
+    with open(path, 'rb') as f:
+        header = f.readline()
+        f.seek(start)
+        body = f.read(end - start)
+    chunk = pd.read_csv(io.BytesIO(header + body), usecols=lambda col: col in FEATURE_COLUMNS)
+    chunk, invalid = validate_chunk(chunk)
+    classes, probabilities = _worker_scorer.predict(chunk)
+    results = results_frame(classes, probabilities, chunk.index.to_numpy() + first_row)
+    # Written under a temporary name and renamed, so a part on disk is always complete
+    partial = f"{part_path}.tmp"
+    results.to_csv(partial, header=False, index=False)
+    os.replace(partial, part_path)
+    return {
+        'scored': len(chunk),
+        'invalid': invalid,
+        'high_risk': int(np.asarray(classes).sum()),
+        'age_sum': float(chunk['age'].sum()),
+        'chol_sum': float(chunk['chol'].sum()),
+        'seconds': time.perf_counter() - started,
+        'worker_pid': os.getpid(),
+    }
+
+
+class Manifest:
+    """Shard plan and progress for every input, saved as JSON after each change"""
+
+    def __init__(self, output_dir):
+        self.path = Path(output_dir) / MANIFEST_NAME
+        self.files = json.loads(self.path.read_text())['files'] if self.path.exists() else {}
+
+    def save(self):
+        partial = self.path.with_suffix('.tmp')
+        partial.write_text(json.dumps({'files': self.files}, indent=1))
+        os.replace(partial, self.path)
+
+    def plan(self, path, shard_bytes, scorer):
+        """The file's entry, re-planned if the file, shard size or scorer changed since it was recorded
+
+        scorer: the engine, resolved model path and scorer version, as from _scorer_identity.
+        """
+        stat = path.stat()
+        key = str(path)
+        identity = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'shard_bytes': shard_bytes, **scorer}
+        entry = self.files.get(key)
+        if entry is None or entry['identity'] != identity:
+            # The index names the file's part files, so it stays fixed across reruns
+            index = entry['index'] if entry is not None else len(self.files)
+            entry = self.files[key] = {'identity': identity, 'index': index,
+                                       'shards': plan_shards(path, shard_bytes), 'merged': False}
+        return entry
+
+
+def _part_path(parts_dir, file_index, shard_index):
+    return parts_dir / f"{file_index:05d}-{shard_index:05d}.csv"
+
+
+def _output_path(output_dir, file_index, path):
+    # Prefixed with the manifest index: inputs from different directories may share a stem
+    return output_dir / f"{file_index:05d}-{path.stem}_predictions.csv"
+
+
+def _scorer_identity(engine, model_path):
+    """What the parts were scored with: a changed model file or scorer version invalidates them"""
+    from serving import DEFAULT_MODEL_PATH, get_scorer
+    model_path = None if engine == 'rules' else Path(model_path or DEFAULT_MODEL_PATH).resolve()
+    # Loaded once here as well, so a bad model fails before any worker starts
+    scorer = get_scorer(engine, model_path)
+    return {'engine': engine, 'model': str(model_path) if model_path else None, 'version': scorer.version}
+
+
+def _merge(parts_dir, output_path, file_index, shards):
+    # Parts hold header-less CSV in row order, so the file is their byte concatenation
+    partial = f"{output_path}.tmp"
+    with open(partial, 'wb') as out:
+        out.write((','.join(RESULT_COLUMNS) + '\n').encode())
+        for shard in shards:
+            with open(_part_path(parts_dir, file_index, shard['index']), 'rb') as part:
+                shutil.copyfileobj(part, out)
+    os.replace(partial, output_path)
+    for shard in shards:
+        _part_path(parts_dir, file_index, shard['index']).unlink()
+
+
+def _summarize(manifest, inputs, wall_s, scored_now):
+    files = {}
+    totals = {'scored': 0, 'invalid': 0, 'high_risk': 0, 'age_sum': 0.0, 'chol_sum': 0.0}
+    for path in inputs:
+        entry = manifest.files[str(path)]
+        file_totals = {name: sum(shard['result'][name] for shard in entry['shards']) for name in totals}
+        for name in totals:
+            totals[name] += file_totals[name]
+        files[str(path)] = {'output': entry['output'], 'shards': len(entry['shards']), **file_totals}
+    count = totals['scored']
+    return {
+        'files': files,
+        'scored': count,
+        'invalid': totals['invalid'],
+        'high_risk': totals['high_risk'],
+        'low_risk': count - totals['high_risk'],
+        'mean_age': totals['age_sum'] / count if count else float('nan'),
+        'mean_chol': totals['chol_sum'] / count if count else float('nan'),
+        'wall_s': wall_s,
+        'rows_scored_this_run': scored_now,
+        'rows_per_s': scored_now / wall_s if wall_s else 0.0,
+    }
+
+
+def run_batch(inputs, output_dir, engine='rules', model_path=None, n_workers=None, shard_bytes=DEFAULT_SHARD_BYTES,
+              on_shard=None):
+    """Score every input file into output_dir, skipping shards a previous run finished; returns the summary"""
+    output_dir = Path(output_dir)
+    parts_dir = output_dir / 'parts'
+    parts_dir.mkdir(parents=True, exist_ok=True)
+    manifest = Manifest(output_dir)
+    inputs = [Path(path).resolve() for path in inputs]
+    scorer = _scorer_identity(engine, model_path)
+    entries = [manifest.plan(path, shard_bytes, scorer) for path in inputs]
+    for path, entry in zip(inputs, entries):
+        entry['output'] = str(_output_path(output_dir, entry['index'], path))
+    outputs = [entry['output'] for entry in entries]
+    if len(set(outputs)) < len(outputs):
+        raise ValueError(f"Several inputs would be written to the same output in {output_dir}")
+    manifest.save()
+
+    pending = [(path, entry, shard) for path, entry in zip(inputs, entries) if not entry['merged']
+               for shard in entry['shards']
+               if not (shard['done'] and _part_path(parts_dir, entry['index'], shard['index']).exists())]
+    n_workers = min(n_workers or os.cpu_count() or 1, max(len(pending), 1))
+    scored_now = 0
+    start = time.perf_counter()
+    if pending:
+        with ProcessPoolExecutor(n_workers, initializer=_init_worker, initargs=(engine, scorer['model'])) as pool:
+            futures = {pool.submit(_score_shard, str(path), shard['start'], shard['end'], shard['first_row'],
+                                   str(_part_path(parts_dir, entry['index'], shard['index']))): (entry, shard)
+                       for path, entry, shard in pending}
+            for future in as_completed(futures):
+                entry, shard = futures[future]
+                shard['result'] = future.result()
+                shard['done'] = True
+                scored_now += shard['result']['scored'] + shard['result']['invalid']
+                manifest.save()
+                if on_shard is not None:
+                    on_shard(entry, shard)
+    for path, entry in zip(inputs, entries):
+        if not entry['merged']:
+            _merge(parts_dir, Path(entry['output']), entry['index'], entry['shards'])
+            entry['merged'] = True
+            manifest.save()
+    summary = _summarize(manifest, inputs, time.perf_counter() - start, scored_now)
+    summary['workers'] = n_workers
+    (output_dir / SUMMARY_NAME).write_text(json.dumps(summary, indent=1))
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score directories or globs of patient CSVs in a process pool')
+    parser.add_argument('inputs', nargs='+', help='CSV files, directories of CSVs or glob patterns')
+    parser.add_argument('--output', required=True, help='Directory for predictions, manifest and summary')
+    parser.add_argument('--engine', choices=['rules', 'model', 'compiled'], default='rules')
+    parser.add_argument('--model', default=None, help='Trained artifact for --engine model, or exported .npz for --engine compiled')
+    parser.add_argument('--workers', type=int, nargs='+', default=[None],
+                        help='Worker counts to run; several values each score into OUTPUT/workers-N and report throughput')
+    parser.add_argument('--shard-mb', type=float, default=DEFAULT_SHARD_BYTES / (1 << 20))
+    args = parser.parse_args(argv)
+
+    inputs = find_inputs(args.inputs)
+    if not inputs:
+        parser.error('no CSV files matched')
+    for n_workers in args.workers:
+        output_dir = Path(args.output)
+        if len(args.workers) > 1:
+            output_dir = output_dir / f"workers-{n_workers or os.cpu_count()}"
+        summary = run_batch(inputs, output_dir, args.engine, args.model, n_workers, int(args.shard_mb * (1 << 20)))
+        print(f"{summary['workers']} workers: {summary['rows_scored_this_run']} rows in {summary['wall_s']:.2f} s "
+              f"({summary['rows_per_s']:,.0f} rows/s), {len(inputs)} files, {summary['high_risk']} high risk, "
+              f"{summary['invalid']} invalid")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,513 @@
+# benchmarks.py
+import argparse
+import ast
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sklearn.linear_model import LogisticRegression
+
+from data_prep import convert_csv, load_data, scale_features, split_data
+from evaluation import Evaluation
+from export import EXPORT_FORMATS, export_bytes
+from features import apply_pca, select_features
+from ingest import ingest_csv
+from models import EXACT_SVM_MAX_SAMPLES, SVM_MODES, get_svm, svm_mode
+from schema import FEATURE_COLUMNS
+from scoring import predict_risk, predict_batch, predict_arrays, round_probabilities
+from serving import ModelScorer, RuleScorer
+from synthetic import make_heart_data, write_heart_csv
+from train_save import load_model, save_model, tune_and_train
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+
+def random_patients(n_rows, seed=0):
+    """Random inputs that hit every score bin, including the bin edges"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'age': rng.integers(20, 90, n_rows),
+        'sex': rng.integers(0, 2, n_rows),
+        'cp': rng.integers(0, 4, n_rows),
+        'trestbps': rng.choice([120, 130, 131, 140, 141, 160], n_rows),
+        'chol': rng.choice([200, 240, 241, 280, 281, 320], n_rows),
+        'fbs': rng.integers(0, 2, n_rows),
+        'restecg': rng.integers(0, 3, n_rows),
+        'thalach': rng.choice([90, 100, 110, 120, 130, 140, 170], n_rows),
+        'exang': rng.integers(0, 2, n_rows),
+        'oldpeak': rng.choice([0.0, 1.0, 1.2, 1.5, 1.8, 2.0, 2.6, np.nan], n_rows),
+        'slope': rng.integers(0, 3, n_rows),
+        'ca': rng.integers(0, 5, n_rows),
+        'thal': rng.integers(0, 4, n_rows),
+    })
+
+
+def legacy_predict_batch(df):
+    """Row-by-row predict_batch as it was before the columnar engine"""
+    results = []
+    for idx, row in df.iterrows():
+        pred, prob = predict_risk([row[col] for col in FEATURE_COLUMNS])
+        results.append({
+            'Patient_ID': idx + 1,
+            'Risk_Probability': round(prob, 2),
+            'Risk_Class': 'High Risk' if pred == 1 else 'Low Risk',
+            'Recommendation': 'Consult Cardiologist Immediately' if pred == 1 else 'Maintain Healthy Lifestyle'
+        })
+    return pd.DataFrame(results)
+
+
+def check_parity(n_rows=20000, seed=0):
+    """Check the columnar engine matches predict_risk row for row at scale (test_scoring.py covers the cases)"""
+    df = random_patients(n_rows, seed)
+    classes, probabilities, _ = predict_arrays(df)
+    expected = [predict_risk(row) for row in df[FEATURE_COLUMNS].itertuples(index=False)]
+    expected_classes = np.array([pred for pred, _ in expected])
+    expected_probabilities = np.array([prob for _, prob in expected], dtype=np.float64)
+    np.testing.assert_array_equal(classes, expected_classes)
+    np.testing.assert_array_equal(probabilities, expected_probabilities)
+    np.testing.assert_array_equal(round_probabilities(probabilities),
+                                  np.array([round(p, 2) for p in expected_probabilities]))
+    pd.testing.assert_frame_equal(predict_batch(df.head(2000)), legacy_predict_batch(df.head(2000)))
+    return n_rows
+
+
+def bench_predict_batch(n_rows=1_000_000, legacy_rows=20000, seed=0):
+    """Time the columnar engine on n_rows and extrapolate the row loop from legacy_rows"""
+    df = random_patients(n_rows, seed)
+    start = time.perf_counter()
+    predict_batch(df)
+    columnar = time.perf_counter() - start
+
+    start = time.perf_counter()
+    legacy_predict_batch(df.head(legacy_rows))
+    legacy = (time.perf_counter() - start) * n_rows / legacy_rows
+    return {'rows': n_rows, 'columnar_s': columnar, 'legacy_s_est': legacy, 'speedup': legacy / columnar}
+
+
+def bench_load_formats(n_rows=1_000_000, seed=0):
+    """Parse time and resident size of load_data for each input format, default vs compact dtypes"""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / 'patients.csv'
+        random_patients(n_rows, seed).fillna(0.0).to_csv(csv_path, index=False)
+        paths = {'csv': csv_path}
+        for fmt in ('parquet', 'feather', 'npy'):
+            paths[fmt] = convert_csv(csv_path, Path(tmp) / f'patients.{fmt}', compact=True)
+        for fmt, path in paths.items():
+            for compact in (False, True):
+                start = time.perf_counter()
+                data = load_data(path, compact=compact)
+                seconds = time.perf_counter() - start
+                results.append({
+                    'format': fmt,
+                    'compact': compact,
+                    'load_s': seconds,
+                    'memory_mb': float(data.memory_usage(deep=True).sum()) / 1e6,
+                })
+                del data
+    return results
+
+
+def legacy_download_html(results_df):
+    """The results link app.py used to rebuild on every rerun: full CSV, base64-encoded into the page"""
+    import base64
+    b64 = base64.b64encode(results_df.to_csv(index=False).encode()).decode()
+    return f'<a href="data:file/csv;base64,{b64}" download="heart_disease_predictions.csv">Download</a>'
+
+
+def bench_export(n_rows=1_000_000, seed=0, repeat=1):
+    """Browser payload and server time/peak memory of the inline base64 link vs on-demand exports"""
+    results_df = predict_batch(random_patients(n_rows, seed).fillna(0.0))
+    results = [{'method': 'base64 link (every rerun)',
+                'payload_mb': len(legacy_download_html(results_df)) / 1e6,
+                **measure(lambda: legacy_download_html(results_df), repeat)}]
+    for fmt in EXPORT_FORMATS:
+        results.append({'method': f'{fmt} (on click)',
+                        'payload_mb': len(export_bytes(results_df, fmt)) / 1e6,
+                        **measure(lambda: export_bytes(results_df, fmt), repeat)})
+    return results
+
+
+def bench_svm(sizes=(10_000, 100_000, 1_000_000), modes=SVM_MODES, exact_max=4 * EXACT_SVM_MAX_SAMPLES, seed=42):
+    """Fit time and held-out accuracy of each SVM mode per dataset size; exact SVC is skipped above exact_max"""
+    from sklearn.metrics import accuracy_score
+
+    results = []
+    for n_rows in sizes:
+        X_train, X_test, y_train, y_test = split_data(make_heart_data(n_rows, seed).astype(np.float64))
+        X_train, X_test, _ = scale_features(X_train, X_test)
+        for mode in modes:
+            row = {'rows': n_rows, 'mode': mode, 'auto': mode == svm_mode(len(X_train))}
+            if mode == 'exact' and len(X_train) > exact_max:
+                results.append(dict(row, fit_s=None, accuracy=None))
+                continue
+            model = get_svm(mode, random_state=seed)
+            start = time.perf_counter()
+            model.fit(X_train, y_train)
+            fit_s = time.perf_counter() - start
+            results.append(dict(row, fit_s=fit_s, accuracy=accuracy_score(y_test, model.predict(X_test))))
+    return results
+
+
+def bench_ingest(n_rows=1_000_000, bad_fraction=0.001, seed=0, repeat=3):
+    """Parse + validate time and peak memory of ingest_csv per engine vs the untyped read_csv it replaced"""
+    import io
+
+    rng = np.random.default_rng(seed)
+    data = make_heart_data(n_rows, seed)
+    bad = rng.random(n_rows) < bad_fraction
+    data['cp'] = data['cp'].where(~bad, 7)
+    data['chol'] = data['chol'].where(~bad, -5)
+    csv_bytes = data.to_csv(index=False, float_format='%g').encode()
+
+    def legacy():
+        df = pd.read_csv(io.BytesIO(csv_bytes))
+        return [col for col in FEATURE_COLUMNS if col not in df.columns]
+
+    results = [{'method': 'read_csv, inferred dtypes, column check only', **measure(legacy, repeat)}]
+    for engine in ('c', 'pyarrow'):
+        ingested = ingest_csv(csv_bytes, engine)
+        results.append({'method': f'ingest_csv[{engine}], typed + validated', 'invalid_rows': ingested.n_invalid,
+                        **measure(lambda: ingest_csv(csv_bytes, engine), repeat)})
+    return results
+
+
+def bench_evaluation(n_rows=1_000_000, n_boot=1000, legacy_boot=20, seed=0):
+    """Evaluation metrics and bootstrap CIs vs one scikit-learn call per metric per resample"""
+    from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+
+    rng = np.random.default_rng(seed)
+    y_true = rng.integers(0, 2, n_rows)
+    y_score = np.clip(0.3 * y_true + rng.random(n_rows) * 0.7, 0, 1)
+    y_pred = (y_score >= 0.5).astype(int)
+    sklearn_metrics = (accuracy_score, precision_score, recall_score, f1_score)
+
+    def legacy_metrics(index=slice(None)):
+        return ([metric(y_true[index], y_pred[index]) for metric in sklearn_metrics]
+                + [roc_auc_score(y_true[index], y_score[index])])
+
+    def legacy_bootstrap():
+        for _ in range(legacy_boot):
+            legacy_metrics(rng.integers(0, n_rows, n_rows))
+
+    evaluation = Evaluation(y_true, y_pred, y_score)
+    legacy_boot_s = measure(legacy_bootstrap, repeat=1)['seconds']
+    return [
+        {'method': 'scikit-learn, one call per metric', **measure(legacy_metrics)},
+        {'method': 'Evaluation.metrics', **measure(evaluation.metrics)},
+        {'method': f'scikit-learn bootstrap, {n_boot} resamples (extrapolated from {legacy_boot})',
+         'seconds': legacy_boot_s * n_boot / legacy_boot, 'peak_mb': None},
+        {'method': f'Evaluation.bootstrap, {n_boot} resamples',
+         **measure(lambda: evaluation.bootstrap(n_boot), repeat=1)},
+    ]
+
+
+def bench_explain(n_rows=1_000_000, train_rows=20_000, seed=0):
+    """Scoring vs attribution time per engine: rules, a scaled logistic regression and a random forest"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    train = make_heart_data(train_rows, seed)
+    X_train = train[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    scaler = StandardScaler().fit(X_train)
+    X_scaled = scaler.transform(X_train)
+    scorers = {'rules': RuleScorer()}
+    # The scorers keep their artifacts in memory; the file only has to exist while they are built
+    with tempfile.TemporaryDirectory() as workdir:
+        path = Path(workdir) / 'explain_model.joblib'
+        for name, model in (('logistic', LogisticRegression(max_iter=1000)),
+                            ('forest', RandomForestClassifier(n_estimators=50, max_depth=8, random_state=seed))):
+            artifact = (scaler, model.fit(X_scaled, train['target']))
+            save_model(artifact, path)
+            scorers[name] = ModelScorer(artifact, path)
+    patients = make_heart_data(n_rows, seed + 1)
+    results = []
+    for name, scorer in scorers.items():
+        scorer.explain(patients.head(10))
+        results.append({'engine': name, 'predict_s': measure(lambda: scorer.predict(patients), 1)['seconds'],
+                        'explain_s': measure(lambda: scorer.explain(patients), 1)['seconds']})
+    return results
+
+
+COLD_START_SCRIPTS = {
+    'joblib': """
+import time
+start = time.perf_counter()
+import numpy as np, pandas as pd
+from serving import ModelScorer
+from train_save import load_model
+imported = time.perf_counter()
+scorer = ModelScorer(load_model({path!r}), {path!r})
+loaded = time.perf_counter()
+""",
+    'compiled': """
+import time
+start = time.perf_counter()
+import numpy as np, pandas as pd
+from compiled import CompiledScorer
+imported = time.perf_counter()
+scorer = CompiledScorer({path!r})
+loaded = time.perf_counter()
+""",
+}
+
+COLD_START_TIMING = """
+from synthetic import make_heart_data
+data = make_heart_data({n_rows})
+single = data.head(1)
+scorer.predict(single)
+t0 = time.perf_counter()
+for _ in range(200):
+    scorer.predict(single)
+t1 = time.perf_counter()
+scorer.predict(data)
+t2 = time.perf_counter()
+print(json.dumps({{'import_s': imported - start, 'load_s': loaded - imported,
+                  'single_row_ms': (t1 - t0) / 200 * 1000, 'batch_us_per_row': (t2 - t1) / {n_rows} * 1e6}}))
+"""
+
+
+def bench_compiled(joblib_path, compiled_path, n_rows=100_000):
+    """Cold-start import, load and per-row latency of the joblib artifact vs its compiled export"""
+    results = {}
+    for name, path in (('joblib', joblib_path), ('compiled', compiled_path)):
+        script = 'import json\n' + COLD_START_SCRIPTS[name].format(path=str(path)) + COLD_START_TIMING.format(n_rows=n_rows)
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                                cwd=Path(__file__).resolve().parent).stdout
+        results[name] = json.loads(output.strip().splitlines()[-1])
+    return results
+
+
+APP_PATH = Path(__file__).resolve().parent / 'app.py'
+# Loaded by serving, not app.py, once the trained model engine is picked
+MODEL_ENGINE_IMPORTS = ['train_save']
+
+
+def _imported(node):
+    if isinstance(node, ast.Import):
+        return [alias.name for alias in node.names]
+    if isinstance(node, ast.ImportFrom) and not node.level:
+        return [node.module]
+    return []
+
+
+def _imports_in(statements):
+    return list(dict.fromkeys(name for statement in statements for node in ast.walk(statement)
+                              for name in _imported(node)))
+
+
+def _input_mode_test(node):
+    # if input_mode == "<option>": ...
+    test = node.test if isinstance(node, ast.If) else None
+    if (isinstance(test, ast.Compare) and isinstance(test.left, ast.Name) and test.left.id == 'input_mode'
+            and isinstance(test.comparators[0], ast.Constant)):
+        return test.comparators[0].value
+    return None
+
+
+def app_mode_imports(path=APP_PATH):
+    """Modules each app mode imports, read from app.py's source so the profile cannot drift from the app
+
+    A mode is app.py's top-level imports plus every import in the branch for its input_mode option.
+    """
+    tree = ast.parse(Path(path).read_text(encoding='utf-8'))
+    base, branches, options = [], {}, None
+    for node in tree.body:
+        base += _imported(node)
+        if (isinstance(node, ast.Assign) and isinstance(node.value, ast.Call)
+                and [target.id for target in node.targets if isinstance(target, ast.Name)] == ['input_mode']):
+            options = ast.literal_eval(node.value.args[1])
+        while _input_mode_test(node) is not None:
+            branches[_input_mode_test(node)] = _imports_in(node.body)
+            node = node.orelse[0] if len(node.orelse) == 1 and isinstance(node.orelse[0], ast.If) else node.orelse
+        if isinstance(node, list) and node:
+            # The final else serves every option not named in the chain
+            for option in options or []:
+                branches.setdefault(option, _imports_in(node))
+    if not branches or (options is not None and set(branches) != set(options)):
+        raise ValueError(f"Could not map every input mode of {path} to its branch; found {sorted(branches)}")
+    modes = {option.split(' ', 1)[-1].lower(): list(dict.fromkeys(base + imports))
+             for option, imports in branches.items()}
+    everything = list(dict.fromkeys(module for imports in modes.values() for module in imports))
+    return {
+        'eager (all modules up front)': everything + MODEL_ENGINE_IMPORTS,
+        **modes,
+        'trained model engine': base + MODEL_ENGINE_IMPORTS,
+    }
+
+
+def profile_app_imports(repeat=3):
+    """Cold import time of the modules each app mode needs, best of repeat fresh interpreters"""
+    results = {}
+    for mode, modules in app_mode_imports().items():
+        script = ('import time\nstart = time.perf_counter()\n' + ''.join(f'import {m}\n' for m in modules)
+                  + 'print(time.perf_counter() - start)')
+        timings = [float(subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                                        cwd=Path(__file__).resolve().parent).stdout) for _ in range(repeat)]
+        results[mode] = min(timings)
+    return results
+
+
+def measure(fn, repeat=3):
+    """Best-of-repeat wall time, then one extra run under tracemalloc for peak allocated memory"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    seconds = min(timings)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': seconds, 'peak_mb': peak / 1e6}
+
+
+def suite_cases(n_rows, workdir, seed=42, max_train_rows=100_000, scalar_rows=10_000):
+    """Yield (name, callable) for every hot path at one dataset size; setup is not timed"""
+    data = make_heart_data(n_rows, seed)
+    csv_path = write_heart_csv(Path(workdir) / f'heart_{n_rows}.csv', n_rows, seed)
+    parquet_path = convert_csv(csv_path, Path(workdir) / f'heart_{n_rows}.parquet')
+
+    X_train, X_test, y_train, y_test = split_data(data.astype(np.float64))
+    X_train_scaled, X_test_scaled, scaler = scale_features(X_train, X_test)
+    train_rows = min(len(X_train_scaled), max_train_rows)
+    model = LogisticRegression(max_iter=1000).fit(X_train_scaled[:train_rows], y_train[:train_rows])
+    model_path = Path(workdir) / f'model_{n_rows}.joblib'
+    save_model((scaler, model), model_path)
+    rows = data[FEATURE_COLUMNS].head(scalar_rows).itertuples(index=False)
+    scalar_inputs = list(rows)
+
+    yield f'predict_risk[{len(scalar_inputs)}]', lambda: [predict_risk(row) for row in scalar_inputs]
+    yield 'predict_batch', lambda: predict_batch(data)
+    yield 'load_data.csv', lambda: load_data(csv_path)
+    yield 'load_data.csv_compact', lambda: load_data(csv_path, compact=True)
+    yield 'load_data.parquet', lambda: load_data(parquet_path)
+    yield 'scale_features', lambda: scale_features(X_train, X_test)
+    yield 'apply_pca', lambda: apply_pca(X_train_scaled, X_test_scaled)
+    yield 'select_features', lambda: select_features(X_train_scaled, y_train, X_test_scaled)
+    yield f'tune_and_train[{train_rows}]', lambda: tune_and_train(
+        LogisticRegression(max_iter=1000), X_train_scaled[:train_rows], y_train[:train_rows], {'C': [0.1, 1.0]})
+    yield 'model_load', lambda: load_model(model_path)
+    yield 'model_predict', lambda: ModelScorer((scaler, model), model_path).predict(data)
+
+
+def run_suite(sizes=DEFAULT_SIZES, seed=42, only=None, max_train_rows=100_000, repeat=3):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_rows in sizes:
+            for name, fn in suite_cases(n_rows, workdir, seed, max_train_rows):
+                if only and not any(name.startswith(prefix) for prefix in only):
+                    continue
+                results[f'{name}@{n_rows}'] = measure(fn, repeat)
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'results': results,
+    }
+
+
+def find_regressions(current, baseline, threshold=0.25, min_seconds=0.005):
+    """List benchmarks whose time or peak memory grew by more than threshold over the baseline"""
+    regressions = []
+    for key, measured in current['results'].items():
+        reference = baseline['results'].get(key)
+        if reference is None:
+            continue
+        for metric in ('seconds', 'peak_mb'):
+            if metric == 'seconds' and reference[metric] < min_seconds:
+                continue  # too short to time reliably
+            if measured[metric] > reference[metric] * (1 + threshold):
+                regressions.append((key, metric, reference[metric], measured[metric]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline hot paths against a JSON baseline')
+    parser.add_argument('--sizes', type=float, nargs='+', default=list(DEFAULT_SIZES),
+                        help='Dataset sizes in rows, e.g. 1e3 1e5 1e7')
+    parser.add_argument('--only', nargs='+', help='Only run benchmarks whose name starts with one of these')
+    parser.add_argument('--baseline', help='JSON baseline to compare against')
+    parser.add_argument('--save', help='Write the results as a JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed relative slowdown or memory growth before failing')
+    parser.add_argument('--max-train-rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per benchmark; the fastest is kept')
+    parser.add_argument('--parity', action='store_true', help='Also check the columnar engine against predict_risk')
+    parser.add_argument('--no-suite', action='store_true',
+                        help='Skip the timing suite and run only the checks and comparisons requested')
+    parser.add_argument('--app-imports', action='store_true', help='Also profile cold import time per app mode')
+    parser.add_argument('--compiled', nargs=2, metavar=('ARTIFACT', 'NPZ'),
+                        help='Also compare cold start of a joblib artifact against its compiled export')
+    parser.add_argument('--export', type=float, metavar='ROWS',
+                        help='Also compare results download payloads for this many rows')
+    parser.add_argument('--svm', type=float, nargs='+', metavar='ROWS',
+                        help='Also compare exact and approximate SVM modes at these sizes')
+    parser.add_argument('--ingest', type=float, metavar='ROWS', help='Also compare CSV ingestion for this many rows')
+    parser.add_argument('--evaluation', type=float, metavar='ROWS',
+                        help='Also compare metric and bootstrap CI computation for this many rows')
+    parser.add_argument('--explain', type=float, metavar='ROWS',
+                        help='Also compare scoring and risk-factor attribution time for this many rows')
+    args = parser.parse_args(argv)
+
+    if args.parity:
+        print(f"Parity OK on {check_parity()} rows")
+    if args.app_imports:
+        for mode, seconds in profile_app_imports().items():
+            print(f"app import [{mode}]: {seconds * 1000:.0f} ms")
+    if args.compiled:
+        for name, timings in bench_compiled(*args.compiled).items():
+            print(name, timings)
+    if args.svm:
+        for row in bench_svm([int(n) for n in args.svm]):
+            fit = 'skipped' if row['fit_s'] is None else f"{row['fit_s']:.2f} s, accuracy {row['accuracy']:.4f}"
+            print(f"svm [{row['rows']} rows, {row['mode']}{' (auto)' if row['auto'] else ''}]: {fit}")
+    if args.ingest:
+        for row in bench_ingest(int(args.ingest)):
+            print(f"ingest [{row['method']}]: {row['seconds'] * 1000:.0f} ms, {row['peak_mb']:.1f} MB peak"
+                  + (f", {row['invalid_rows']} invalid rows" if 'invalid_rows' in row else ''))
+    if args.evaluation:
+        for row in bench_evaluation(int(args.evaluation)):
+            peak = '' if row['peak_mb'] is None else f", {row['peak_mb']:.1f} MB peak"
+            print(f"evaluation [{row['method']}]: {row['seconds'] * 1000:.0f} ms{peak}")
+    if args.explain:
+        for row in bench_explain(int(args.explain)):
+            print(f"explain [{row['engine']}]: predict {row['predict_s'] * 1000:.0f} ms, "
+                  f"attribution {row['explain_s'] * 1000:.0f} ms")
+    if args.export:
+        for row in bench_export(int(args.export)):
+            print(f"export [{row['method']}]: {row['payload_mb']:.1f} MB payload, "
+                  f"{row['seconds'] * 1000:.0f} ms, {row['peak_mb']:.1f} MB peak")
+    if args.no_suite:
+        return 0
+    report = run_suite([int(n) for n in args.sizes], only=args.only,
+                       max_train_rows=args.max_train_rows, repeat=args.repeat)
+    for key, measured in report['results'].items():
+        print(f"{key:40s} {measured['seconds'] * 1000:10.2f} ms {measured['peak_mb']:10.1f} MB")
+    if args.save:
+        Path(args.save).write_text(json.dumps(report, indent=2))
+    if args.baseline:
+        regressions = find_regressions(report, json.loads(Path(args.baseline).read_text()), args.threshold)
+        for key, metric, reference, measured in regressions:
+            print(f"REGRESSION {key} {metric}: {reference:.4g} -> {measured:.4g}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# checkpoint.py
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import sklearn
+from sklearn.base import clone, is_classifier
+from sklearn.metrics import check_scoring
+from sklearn.model_selection import ParameterGrid, ParameterSampler, check_cv
+
+from stage_cache import fingerprint
+
+# A checkpointed search appends one JSON line per finished (candidate, fold)
+# fit. The file is keyed by the base estimator, the data and the CV splits but
+# not the grid, so a killed search resumes where it stopped and an extended
+# grid only fits the candidates it has not seen.
+
+DEFAULT_CHECKPOINT_DIR = '.search_checkpoints'
+
+
+def candidate_key(params):
+    """Stable identity of one parameter combination"""
+    return json.dumps(params, sort_keys=True, default=repr)
+
+
+class SearchCheckpoint:
+    """Append-only JSON-lines store of (candidate, fold) scores for one estimator, dataset and CV split"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.scores = {}
+        if self.path.exists():
+            data = self.path.read_bytes()
+            complete = data.rfind(b'\n') + 1
+            if complete < len(data):
+                # Drop the line being written when the process died so appends start on a fresh line
+                os.truncate(self.path, complete)
+            for line in data[:complete].splitlines():
+                record = json.loads(line)
+                self.scores[(record['candidate'], record['fold'])] = record['score']
+
+    def __contains__(self, item):
+        return item in self.scores
+
+    def __len__(self):
+        return len(self.scores)
+
+    def append(self, candidate, fold, score, fit_s):
+        record = {'candidate': candidate, 'fold': fold, 'score': score, 'fit_s': round(fit_s, 6)}
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.scores[(candidate, fold)] = score
+
+
+def _estimator_identity(model):
+    # Nested estimators appear as their class; their parameters are already listed under name__param keys
+    params = {name: _class_name(value) if hasattr(value, 'get_params') else value
+              for name, value in model.get_params(deep=True).items()}
+    return {'class': _class_name(model), 'params': params}
+
+
+def _class_name(obj):
+    return f"{type(obj).__module__}.{type(obj).__qualname__}"
+
+
+def _rows(X, index):
+    return X.iloc[index] if hasattr(X, 'iloc') else X[index]
+
+
+def _fit_fold(key, fold, model, params, X, y, train, test, scorer):
+    start = time.perf_counter()
+    estimator = clone(model).set_params(**params).fit(_rows(X, train), _rows(y, train))
+    fit_s = time.perf_counter() - start
+    return key, fold, float(scorer(estimator, _rows(X, test), _rows(y, test))), fit_s
+
+
+class ResumableSearch:
+    """Grid or random search whose fold scores survive interruption; mirrors GridSearchCV's best_* attributes"""
+
+    def __init__(self, model, param_grid, checkpoint_dir=DEFAULT_CHECKPOINT_DIR, strategy='grid', cv=5,
+                 scoring=None, n_jobs=None, n_iter=10, random_state=42, refit=True):
+        self.model = model
+        self.param_grid = param_grid
+        self.checkpoint_dir = checkpoint_dir
+        self.strategy = strategy
+        self.cv = cv
+        self.scoring = scoring
+        self.n_jobs = n_jobs
+        self.n_iter = n_iter
+        self.random_state = random_state
+        self.refit = refit
+
+    def candidates(self):
+        if self.strategy == 'grid':
+            return list(ParameterGrid(self.param_grid))
+        if self.strategy == 'random':
+            # Seeded sampling draws the same candidates on every resume
+            return list(ParameterSampler(self.param_grid, self.n_iter, random_state=self.random_state))
+        raise ValueError(f"Checkpointed search supports the 'grid' and 'random' strategies, not {self.strategy!r}")
+
+    def checkpoint_path(self, X, y, splits):
+        digest = hashlib.blake2b(digest_size=20)
+        # Not repr(): scikit-learn elides long reprs, so different estimators could share a file
+        fingerprint({'model': _estimator_identity(self.model), 'scoring': self.scoring, 'sklearn': sklearn.__version__},
+                    digest)
+        for array in (X, y, *(test for _, test in splits)):
+            fingerprint(array, digest)
+        return Path(self.checkpoint_dir) / f"{type(self.model).__name__}-{digest.hexdigest()}.jsonl"
+
+    def fit(self, X, y):
+        from joblib import Parallel, delayed
+
+        candidates = self.candidates()
+        splits = list(check_cv(self.cv, y, classifier=is_classifier(self.model)).split(X, y))
+        scorer = check_scoring(self.model, scoring=self.scoring)
+        self.checkpoint_ = SearchCheckpoint(self.checkpoint_path(X, y, splits))
+        keys = [candidate_key(params) for params in candidates]
+        pending = [(key, params, fold) for key, params in zip(keys, candidates)
+                   for fold in range(len(splits)) if (key, fold) not in self.checkpoint_]
+        self.n_reused_ = len(candidates) * len(splits) - len(pending)
+        self.n_fitted_ = len(pending)
+
+        # Unordered generator: each fit is written to the checkpoint as soon as it finishes
+        results = Parallel(n_jobs=self.n_jobs, return_as='generator_unordered')(
+            delayed(_fit_fold)(key, fold, self.model, params, X, y, *splits[fold], scorer)
+            for key, params, fold in pending)
+        for key, fold, score, fit_s in results:
+            self.checkpoint_.append(key, fold, score, fit_s)
+
+        mean_scores = np.array([np.mean([self.checkpoint_.scores[(key, fold)] for fold in range(len(splits))])
+                                for key in keys])
+        self.cv_results_ = {'params': candidates, 'mean_test_score': mean_scores}
+        self.best_index_ = int(np.nanargmax(mean_scores))
+        self.best_params_ = candidates[self.best_index_]
+        self.best_score_ = float(mean_scores[self.best_index_])
+        if self.refit:
+            self.best_estimator_ = clone(self.model).set_params(**self.best_params_).fit(X, y)
+        return self
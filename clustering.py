@@ -0,0 +1,141 @@
+# clustering.py
+import argparse
+
+import numpy as np
+from sklearn.base import BaseEstimator, ClusterMixin
+from sklearn.cluster import KMeans, MiniBatchKMeans
+
+from data_prep import iter_data
+from schema import FEATURE_COLUMNS, TARGET_COLUMN
+
+# Hierarchical clustering needs the full pairwise linkage, O(n^2) memory, so it
+# runs on k-means prototypes instead of patients: 1M rows become a few hundred
+# centroids, and the tree cut is mapped back onto rows through their prototype.
+
+DEFAULT_PROTOTYPES = 256
+KMEANS_ALGORITHMS = ('lloyd', 'elkan')
+
+
+def make_kmeans(n_clusters=2, algorithm='lloyd', random_state=42):
+    """Full-batch k-means; elkan skips distance computations with the triangle inequality"""
+    if algorithm not in KMEANS_ALGORITHMS:
+        raise ValueError(f"Unknown k-means algorithm: {algorithm!r} (expected one of {', '.join(KMEANS_ALGORITHMS)})")
+    return KMeans(n_clusters=n_clusters, algorithm=algorithm, n_init=1, random_state=random_state)
+
+
+def make_minibatch_kmeans(n_clusters=2, batch_size=4096, random_state=42):
+    return MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size, n_init=3, random_state=random_state)
+
+
+def fit_stream(file_path, n_clusters=2, chunksize=100_000, scaler=None, model=None, random_state=42):
+    """Mini-batch k-means over a file read chunk by chunk; scaler (fitted) is applied to each chunk"""
+    model = model if model is not None else make_minibatch_kmeans(n_clusters, random_state=random_state)
+    for chunk in iter_data(file_path, chunksize, columns=FEATURE_COLUMNS, compact=True):
+        X = chunk.to_numpy(dtype=np.float32)
+        if scaler is not None:
+            X = scaler.transform(X)
+        if len(X) >= model.n_clusters:
+            # A trailing chunk smaller than n_clusters cannot seed or update every centre
+            model.partial_fit(X)
+    return model
+
+
+class PrototypeHierarchical(ClusterMixin, BaseEstimator):
+    """Agglomerative clustering of k-means prototypes, cut into n_clusters and mapped back to rows"""
+
+    def __init__(self, n_clusters=2, n_prototypes=DEFAULT_PROTOTYPES, method='ward', random_state=42):
+        self.n_clusters = n_clusters
+        self.n_prototypes = n_prototypes
+        self.method = method
+        self.random_state = random_state
+
+    def fit(self, X, y=None):
+        from scipy.cluster.hierarchy import fcluster, linkage
+
+        n_prototypes = min(self.n_prototypes, len(X))
+        self.prototypes_ = make_minibatch_kmeans(n_prototypes, random_state=self.random_state).fit(X)
+        self.prototype_counts_ = np.bincount(self.prototypes_.labels_, minlength=n_prototypes)
+        # Empty prototypes have no rows to cluster; keep them out of the linkage
+        self.active_prototypes_ = np.flatnonzero(self.prototype_counts_)
+        centres = self.prototypes_.cluster_centers_[self.active_prototypes_]
+        self.linkage_ = linkage(centres, method=self.method)
+        cluster_of = np.zeros(n_prototypes, dtype=np.intp)
+        cluster_of[self.active_prototypes_] = fcluster(self.linkage_, self.n_clusters, criterion='maxclust') - 1
+        self.prototype_clusters_ = cluster_of
+        self.labels_ = cluster_of[self.prototypes_.labels_]
+        return self
+
+    def predict(self, X):
+        return self.prototype_clusters_[self.prototypes_.predict(X)]
+
+    def dendrogram(self, **kwargs):
+        """scipy dendrogram data for the prototype tree, leaves labelled with their patient counts"""
+        from scipy.cluster.hierarchy import dendrogram
+        labels = [str(count) for count in self.prototype_counts_[self.active_prototypes_]]
+        return dendrogram(self.linkage_, labels=labels, no_plot=True, **kwargs)
+
+
+def contingency(labels_true, labels_pred):
+    """(table, true classes, predicted clusters): rows count each true class across predicted clusters"""
+    classes, true_index = np.unique(labels_true, return_inverse=True)
+    clusters, pred_index = np.unique(labels_pred, return_inverse=True)
+    table = np.bincount(true_index.ravel() * len(clusters) + pred_index.ravel(),
+                        minlength=len(classes) * len(clusters)).reshape(len(classes), len(clusters))
+    return table, classes, clusters
+
+
+def _pairs(counts):
+    counts = counts.astype(np.float64)
+    return (counts * (counts - 1) / 2).sum()
+
+
+def adjusted_rand_from_table(table):
+    """Adjusted Rand index from a contingency table, without revisiting the labels"""
+    n_pairs = _pairs(np.array([table.sum()]))
+    index = _pairs(table)
+    rows = _pairs(table.sum(axis=1))
+    cols = _pairs(table.sum(axis=0))
+    expected = rows * cols / n_pairs if n_pairs else 0.0
+    maximum = (rows + cols) / 2
+    if maximum == expected:
+        return 1.0
+    return float((index - expected) / (maximum - expected))
+
+
+def agreement_report(labels_true, labels_pred):
+    """Cluster-vs-label agreement: contingency table, adjusted Rand index and majority-label purity"""
+    table, classes, clusters = contingency(labels_true, labels_pred)
+    return {
+        'classes': classes,
+        'clusters': clusters,
+        'contingency': table,
+        'ari': adjusted_rand_from_table(table),
+        'purity': float(table.max(axis=0).sum() / table.sum()) if table.size else 0.0,
+        'majority_label': dict(zip(clusters.tolist(), classes[table.argmax(axis=0)].tolist())),
+    }
+
+
+def main(argv=None):
+    from incremental import fit_scaler
+
+    parser = argparse.ArgumentParser(description='Stream mini-batch k-means over a patient file and report agreement')
+    parser.add_argument('data', help='CSV, Parquet, Feather or .npy file with the features and target')
+    parser.add_argument('--clusters', type=int, default=2)
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    scaler = fit_scaler(args.data, args.chunksize, test_every=0)
+    model = fit_stream(args.data, args.clusters, args.chunksize, scaler)
+    table = None
+    for chunk in iter_data(args.data, args.chunksize, columns=FEATURE_COLUMNS + [TARGET_COLUMN], compact=True):
+        labels = model.predict(scaler.transform(chunk[FEATURE_COLUMNS].to_numpy(dtype=np.float32)))
+        # Per-chunk tables add up, so the report never needs all labels in memory
+        pairs = chunk[TARGET_COLUMN].to_numpy(dtype=np.intp) * args.clusters + labels
+        part = np.bincount(pairs, minlength=2 * args.clusters).reshape(2, args.clusters)
+        table = part if table is None else table + part
+    print(table)
+    print(f"ARI {adjusted_rand_from_table(table):.4f}")
+
+
+if __name__ == '__main__':
+    main()
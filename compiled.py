@@ -0,0 +1,228 @@
+# compiled.py
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from schema import FEATURE_COLUMNS
+
+# Only NumPy is imported at module level: workers that score with a compiled
+# artifact never import scikit-learn or unpickle estimator objects.
+
+LOGISTIC_LOSSES = ('log_loss', 'log')
+ROW_BLOCK = 8192
+
+
+def _artifact_steps(artifact):
+    if isinstance(artifact, tuple):
+        return list(artifact)
+    if hasattr(artifact, 'steps'):
+        return [step for _, step in artifact.steps]
+    return [artifact]
+
+
+def _export_transformer(step, arrays, prefix):
+    kind = type(step).__name__
+    if hasattr(step, 'scale_') and hasattr(step, 'mean_') and hasattr(step, 'var_'):
+        n_features = step.n_features_in_
+        # StandardScaler(with_mean=False) still stores mean_ but does not centre; likewise for with_std
+        centre = getattr(step, 'with_mean', True) and step.mean_ is not None
+        divide = getattr(step, 'with_std', True) and step.scale_ is not None
+        arrays[f'{prefix}mean'] = step.mean_ if centre else np.zeros(n_features)
+        arrays[f'{prefix}scale'] = step.scale_ if divide else np.ones(n_features)
+        return {'type': 'scale'}
+    if hasattr(step, 'get_support'):
+        arrays[f'{prefix}indices'] = step.get_support(indices=True)
+        return {'type': 'select'}
+    if hasattr(step, 'components_') and hasattr(step, 'explained_variance_'):
+        arrays[f'{prefix}mean'] = step.mean_
+        arrays[f'{prefix}components'] = step.components_
+        if getattr(step, 'whiten', False):
+            arrays[f'{prefix}explained_variance'] = step.explained_variance_
+        return {'type': 'pca', 'whiten': bool(getattr(step, 'whiten', False))}
+    raise TypeError(f"Cannot compile transformer {kind}")
+
+
+def _export_model(model, arrays):
+    kind = type(model).__name__
+    arrays['classes'] = np.asarray(model.classes_)
+    if len(model.classes_) != 2:
+        raise TypeError(f"Only binary classifiers can be compiled, {kind} has {len(model.classes_)} classes")
+    if hasattr(model, 'coef_') and hasattr(model, 'intercept_'):
+        arrays['coef'] = np.asarray(model.coef_, dtype=np.float64).reshape(-1)
+        arrays['intercept'] = np.asarray(model.intercept_, dtype=np.float64).reshape(-1)
+        loss = getattr(model, 'loss', None)
+        if kind == 'LogisticRegression' or loss in LOGISTIC_LOSSES:
+            link = 'logistic'
+        elif loss == 'modified_huber':
+            link = 'modified_huber'
+        else:
+            link = 'hard'
+        return {'type': 'linear', 'link': link, 'source': kind}
+    trees = getattr(model, 'estimators_', None)
+    if trees is None and hasattr(model, 'tree_'):
+        trees = [model]
+    if trees is not None and all(hasattr(tree, 'tree_') for tree in trees):
+        left, right, feature, threshold, value, roots = [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            t = tree.tree_
+            node_value = t.value[:, 0, :]
+            node_value = node_value / node_value.sum(axis=1, keepdims=True)
+            is_leaf = t.children_left == -1
+            # Children are re-based so every tree lives in one flat node table
+            left.append(np.where(is_leaf, -1, t.children_left + offset))
+            right.append(np.where(is_leaf, -1, t.children_right + offset))
+            feature.append(np.where(is_leaf, 0, t.feature))
+            threshold.append(t.threshold)
+            value.append(node_value[:, 1])
+            roots.append(offset)
+            offset += t.node_count
+        arrays['left'] = np.concatenate(left).astype(np.int32)
+        arrays['right'] = np.concatenate(right).astype(np.int32)
+        arrays['feature'] = np.concatenate(feature).astype(np.int32)
+        arrays['threshold'] = np.concatenate(threshold)
+        arrays['value'] = np.concatenate(value)
+        arrays['roots'] = np.asarray(roots, dtype=np.int32)
+        return {'type': 'forest', 'max_depth': int(max(tree.tree_.max_depth for tree in trees)), 'source': kind}
+    raise TypeError(f"Cannot compile model {kind}")
+
+
+def _export_arrays(artifact):
+    steps = _artifact_steps(artifact)
+    arrays = {}
+    spec = {'format': 1, 'steps': []}
+    for i, step in enumerate(steps[:-1]):
+        spec['steps'].append(_export_transformer(step, arrays, f'step{i}_'))
+    spec['model'] = _export_model(steps[-1], arrays)
+    arrays['spec'] = np.frombuffer(json.dumps(spec).encode(), dtype=np.uint8)
+    return arrays
+
+
+def export_artifact(artifact, path):
+    """Write a (scaler, [selector | pca], model) artifact as plain arrays in an .npz file"""
+    np.savez(path, **_export_arrays(artifact))
+    return path
+
+
+def compile_artifact(artifact):
+    """CompiledModel for an in-memory artifact, without writing an .npz"""
+    return CompiledModel(_export_arrays(artifact))
+
+
+class CompiledModel:
+    """NumPy-only predictor for artifacts written by export_artifact"""
+
+    def __init__(self, arrays):
+        self.spec = json.loads(bytes(arrays['spec']).decode())
+        names = arrays.files if hasattr(arrays, 'files') else arrays.keys()
+        self.arrays = {name: arrays[name] for name in names if name != 'spec'}
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls(arrays)
+
+    def transform(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        for i, step in enumerate(self.spec['steps']):
+            prefix = f'step{i}_'
+            if step['type'] == 'scale':
+                X = (X - self.arrays[f'{prefix}mean']) / self.arrays[f'{prefix}scale']
+            elif step['type'] == 'select':
+                X = X[:, self.arrays[f'{prefix}indices']]
+            elif step['type'] == 'pca':
+                X = (X - self.arrays[f'{prefix}mean']) @ self.arrays[f'{prefix}components'].T
+                if step['whiten']:
+                    X /= np.sqrt(self.arrays[f'{prefix}explained_variance'])
+        return X
+
+    def decision_function(self, X):
+        return self.transform(X) @ self.arrays['coef'] + self.arrays['intercept'][0]
+
+    def forest_leaves(self, block):
+        """Leaf node of every (row, tree) pair, row-major, for a block of transformed float32 rows"""
+        a = self.arrays
+        n_trees = len(a['roots'])
+        flat = block.reshape(-1)
+        # One entry per (row, tree) pair; only pairs not yet at a leaf are walked each level
+        nodes = np.tile(a['roots'], len(block))
+        offsets = np.repeat(np.arange(len(block)) * block.shape[1], n_trees)
+        active = np.arange(len(nodes))
+        while active.size:
+            current = nodes[active]
+            left = a['left'][current]
+            inner = left != -1
+            active, current, left = active[inner], current[inner], left[inner]
+            go_left = flat[offsets[active] + a['feature'][current]] <= a['threshold'][current]
+            nodes[active] = np.where(go_left, left, a['right'][current])
+        return nodes
+
+    def _forest_proba(self, X):
+        a = self.arrays
+        # scikit-learn trees compare float32 inputs against float64 thresholds
+        X = X.astype(np.float32)
+        n_trees = len(a['roots'])
+        proba = np.empty(len(X))
+        for start in range(0, len(X), ROW_BLOCK):
+            block = X[start:start + ROW_BLOCK]
+            leaves = self.forest_leaves(block)
+            proba[start:start + ROW_BLOCK] = a['value'][leaves].reshape(len(block), n_trees).mean(axis=1)
+        return proba
+
+    def predict_proba(self, X):
+        """Probability of each class, columns ordered as classes"""
+        model = self.spec['model']
+        if model['type'] == 'forest':
+            positive = self._forest_proba(self.transform(X))
+        else:
+            scores = self.decision_function(X)
+            if model['link'] == 'logistic':
+                positive = 1 / (1 + np.exp(-scores))
+            elif model['link'] == 'modified_huber':
+                positive = (np.clip(scores, -1, 1) + 1) / 2
+            else:
+                positive = (scores > 0).astype(np.float64)
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, X):
+        return self.arrays['classes'][(self.predict_proba(X)[:, 1] > 0.5).astype(np.intp)]
+
+
+class CompiledScorer:
+    """Scorer interface (see serving.py) over a compiled artifact"""
+
+    def __init__(self, path):
+        start = time.perf_counter()
+        self.model = CompiledModel.load(path)
+        self.load_seconds = time.perf_counter() - start
+        self.path = Path(path)
+        self.name = 'compiled'
+        self.version = f"compiled:{self.path.name}:{self.path.stat().st_mtime_ns}"
+
+    def predict(self, df):
+        """Return (classes, probabilities in percent) for a patient frame"""
+        X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float64) if hasattr(df, 'columns') else df
+        probabilities = self.model.predict_proba(X)[:, 1] * 100
+        classes = (probabilities >= 50).astype(np.int8)
+        return classes, probabilities
+
+    def explain(self, df):
+        """explain.Attribution of every patient's output"""
+        from explain import explain_compiled
+        X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float64) if hasattr(df, 'columns') else df
+        return explain_compiled(self.model, X)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    import joblib
+
+    parser = argparse.ArgumentParser(description='Export a trained artifact to a NumPy-only .npz')
+    parser.add_argument('artifact', help='joblib artifact, e.g. models/final_model.pkl')
+    parser.add_argument('output', help='Destination .npz')
+    args = parser.parse_args()
+    export_artifact(joblib.load(args.artifact), args.output)
+    print(f"Wrote {args.output}")
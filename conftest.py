@@ -0,0 +1,42 @@
+# conftest.py
+import pytest
+from sklearn.decomposition import PCA
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_selection import SelectKBest
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+# (transformers, model) pipelines of the shapes train_save writes, shared by the
+# compiled-model and attribution tests; tests taking `artifact_case` run once per entry
+ARTIFACT_CASES = {
+    'scaled_logistic': lambda: ([StandardScaler()], LogisticRegression(max_iter=1000)),
+    'scale_without_mean': lambda: ([StandardScaler(with_mean=False)], LogisticRegression(max_iter=1000)),
+    'scale_without_std': lambda: ([StandardScaler(with_std=False)], LogisticRegression(max_iter=1000)),
+    'select_logistic': lambda: ([StandardScaler(), SelectKBest(k=5)], LogisticRegression(max_iter=1000)),
+    'pca_logistic': lambda: ([StandardScaler(), PCA(n_components=5)], LogisticRegression(max_iter=1000)),
+    'whitened_pca': lambda: ([StandardScaler(), PCA(n_components=5, whiten=True)], LogisticRegression()),
+    'sgd_modified_huber': lambda: ([StandardScaler()], SGDClassifier(loss='modified_huber', random_state=0)),
+    'forest': lambda: ([StandardScaler()], RandomForestClassifier(n_estimators=20, max_depth=8, random_state=0)),
+    'select_forest': lambda: ([StandardScaler(), SelectKBest(k=6)],
+                              RandomForestClassifier(n_estimators=20, random_state=0)),
+    'tree_without_mean': lambda: ([StandardScaler(with_mean=False)], DecisionTreeClassifier(random_state=0)),
+}
+
+
+def pytest_generate_tests(metafunc):
+    if 'artifact_case' in metafunc.fixturenames:
+        metafunc.parametrize('artifact_case', sorted(ARTIFACT_CASES))
+
+
+@pytest.fixture
+def fit_artifact():
+    """Fit one of ARTIFACT_CASES step by step on (X, y); returns the (*transformers, model) artifact"""
+    def fit(case, X, y):
+        transformers, model = ARTIFACT_CASES[case]()
+        steps = []
+        for transformer in transformers:
+            X = transformer.fit_transform(X, y)
+            steps.append(transformer)
+        return (*steps, model.fit(X, y))
+    return fit
@@ -1,19 +1,153 @@
 # data_prep.py
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 
-def load_data(file_path):
-    data = pd.read_csv(file_path)
+from instrumentation import instrumented
+from schema import COMPACT_DTYPES, FEATURE_COLUMNS, TARGET_COLUMN
+
+# Rows per partial_fit batch when scaling in low-memory mode
+SCALE_BATCH_ROWS = 65_536
+
+def _npy_columns(n_columns):
+    # Plain .npy arrays carry no header, so assume the heart.csv column order
+    if n_columns == len(FEATURE_COLUMNS):
+        return FEATURE_COLUMNS
+    if n_columns == len(FEATURE_COLUMNS) + 1:
+        return FEATURE_COLUMNS + [TARGET_COLUMN]
+    raise ValueError(f"Expected {len(FEATURE_COLUMNS)} or {len(FEATURE_COLUMNS) + 1} columns in .npy input, got {n_columns}")
+
+def compact_dtypes(columns):
+    return {col: COMPACT_DTYPES[col] for col in columns if col in COMPACT_DTYPES}
+
+@instrumented()
+def load_data(file_path, compact=False, columns=None):
+    # Reads .csv, .parquet, .feather or a 2-D .npy array (memory-mapped, not copied).
+    # compact=True stores category codes as int8 and vitals as float32.
+    suffix = Path(file_path).suffix.lower()
+    if suffix == '.parquet':
+        data = pd.read_parquet(file_path, columns=columns)
+    elif suffix == '.feather':
+        data = pd.read_feather(file_path, columns=columns)
+    elif suffix == '.npy':
+        array = np.load(file_path, mmap_mode='r')
+        data = pd.DataFrame(array, columns=_npy_columns(array.shape[1]), copy=False)
+        if columns is not None:
+            data = data[columns]
+    else:
+        dtype = None
+        if compact:
+            header = pd.read_csv(file_path, nrows=0, usecols=columns).columns
+            dtype = compact_dtypes(header)
+        return pd.read_csv(file_path, usecols=columns, dtype=dtype)
+    if compact:
+        data = data.astype(compact_dtypes(data.columns))
     return data
 
-def split_data(data, target_col='target', test_size=0.2, random_state=42):
+def iter_data(file_path, chunksize=100_000, columns=None, compact=False):
+    # Yield DataFrame chunks of at most chunksize rows from any load_data format
+    suffix = Path(file_path).suffix.lower()
+    if suffix == '.parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunksize, columns=columns):
+            chunk = batch.to_pandas()
+            yield chunk.astype(compact_dtypes(chunk.columns)) if compact else chunk
+    elif suffix == '.feather':
+        import pyarrow as pa
+        # Feather files are stored as record batches (64k rows by default); decode a few at a time
+        with pa.memory_map(str(file_path)) as source:
+            reader = pa.ipc.open_file(source)
+            batches, rows = [], 0
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                batches.append(batch.select(columns) if columns is not None else batch)
+                rows += batch.num_rows
+                if rows >= chunksize or i == reader.num_record_batches - 1:
+                    chunk = pa.Table.from_batches(batches).to_pandas()
+                    batches, rows = [], 0
+                    yield chunk.astype(compact_dtypes(chunk.columns)) if compact else chunk
+    elif suffix == '.npy':
+        # load_data memory-maps .npy, so each slice only pages in its own rows
+        data = load_data(file_path, columns=columns)
+        for start in range(0, len(data), chunksize):
+            chunk = data.iloc[start:start + chunksize]
+            yield chunk.astype(compact_dtypes(chunk.columns)) if compact else chunk
+    else:
+        dtype = None
+        if compact:
+            header = pd.read_csv(file_path, nrows=0, usecols=columns).columns
+            dtype = compact_dtypes(header)
+        with pd.read_csv(file_path, usecols=columns, dtype=dtype, chunksize=chunksize) as reader:
+            yield from reader
+
+def convert_csv(csv_path, output_path, compact=True):
+    # Convert a CSV registry export to .parquet, .feather or .npy (chosen by suffix)
+    data = load_data(csv_path, compact=compact)
+    suffix = Path(output_path).suffix.lower()
+    if suffix == '.parquet':
+        data.to_parquet(output_path, index=False)
+    elif suffix == '.feather':
+        data.to_feather(output_path)
+    elif suffix == '.npy':
+        data = data[FEATURE_COLUMNS + [col for col in [TARGET_COLUMN] if col in data.columns]]
+        np.save(output_path, data.to_numpy(dtype=np.float32 if compact else np.float64))
+    else:
+        raise ValueError(f"Unsupported output format: {suffix or output_path}")
+    return output_path
+
+def _split_float32(data, target_col, test_size, random_state):
+    # Same shuffle as splitting the frame: train_test_split permutes row positions only
+    train, test = train_test_split(np.arange(len(data)), test_size=test_size, random_state=random_state)
+    columns = [col for col in data.columns if col != target_col]
+    X_train = np.empty((len(train), len(columns)), dtype=np.float32)
+    X_test = np.empty((len(test), len(columns)), dtype=np.float32)
+    # Gathering one column at a time never materialises a full-width copy of data
+    for j, col in enumerate(columns):
+        values = data[col].to_numpy()
+        X_train[:, j] = values[train]
+        X_test[:, j] = values[test]
+    y = data[target_col].to_numpy()
+    return X_train, X_test, y[train], y[test]
+
+@instrumented()
+def split_data(data, target_col='target', test_size=0.2, random_state=42, low_memory=False):
+    # low_memory=True returns float32 arrays instead of DataFrames; data can be freed right after
+    if low_memory:
+        return _split_float32(data, target_col, test_size, random_state)
     X = data.drop(target_col, axis=1)
     y = data[target_col]
     return train_test_split(X, y, test_size=test_size, random_state=random_state)
 
-def scale_features(X_train, X_test):
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
+def _in_place(target, result):
+    # Where a computed low-memory scaling would have overwritten the input, a cached one is copied into it
+    if (isinstance(target, np.ndarray) and target.dtype.kind == 'f' and target.flags.writeable
+            and result is not target):
+        np.copyto(target, result, casting='same_kind')
+        return target
+    return result
+
+@instrumented()
+def scale_features(X_train, X_test, cache=None, low_memory=False):
+    # cache: optional stage_cache.StageCache; reuses the fit when the inputs are unchanged.
+    # low_memory=True scales float arrays in place (the inputs are overwritten) and keeps float32,
+    # whether the result was computed or read from the cache.
+    if cache is not None:
+        params = {'low_memory': True} if low_memory else {}
+        X_train_scaled, X_test_scaled, scaler = cache.get_or_compute(
+            'scale_features', params, (X_train, X_test), lambda: scale_features(X_train, X_test, low_memory=low_memory))
+        if low_memory:
+            X_train_scaled, X_test_scaled = _in_place(X_train, X_train_scaled), _in_place(X_test, X_test_scaled)
+        return X_train_scaled, X_test_scaled, scaler
+    scaler = StandardScaler(copy=not low_memory)
+    if low_memory:
+        # Batched statistics avoid a float64 copy of the whole training set during fit
+        for start in range(0, len(X_train), SCALE_BATCH_ROWS):
+            scaler.partial_fit(X_train[start:start + SCALE_BATCH_ROWS])
+        X_train_scaled = scaler.transform(X_train)
+    else:
+        X_train_scaled = scaler.fit_transform(X_train)
     X_test_scaled = scaler.transform(X_test)
     return X_train_scaled, X_test_scaled, scaler
@@ -0,0 +1,131 @@
+# evaluation.py
+import numpy as np
+
+# Every metric comes from one inference pass: predictions are derived from the
+# same probabilities (or decision scores) used for ROC AUC, and the threshold
+# metrics all come from one 2x2 confusion count.
+#
+# Bootstrap resampling draws all replicates at once. A resample of n rows is a
+# multinomial draw of n over the distinct (score bin, label, prediction) cells,
+# which is exactly equivalent to an index-matrix resample of the rows but costs
+# O(cells) per replicate instead of O(n).
+
+METRICS = ('accuracy', 'precision', 'recall', 'specificity', 'f1', 'roc_auc')
+DEFAULT_BOOTSTRAPS = 1000
+# Scores with more distinct values are grouped into this many quantile bins for
+# the bootstrap only; the point estimates always use the exact scores
+MAX_SCORE_BINS = 2048
+BOOTSTRAP_BLOCK = 100
+
+
+def predict_once(model, X):
+    """(predictions, positive-class scores) from a single inference call"""
+    classes = getattr(model, 'classes_', None)
+    if classes is not None and hasattr(model, 'predict_proba'):
+        proba = model.predict_proba(X)
+        return classes[proba.argmax(axis=1)], proba[:, -1]
+    if classes is not None and hasattr(model, 'decision_function'):
+        decision = model.decision_function(X)
+        return classes[(decision > 0).astype(np.intp)], decision
+    predictions = model.predict(X)
+    return predictions, None
+
+
+def _divide(numerator, denominator):
+    # Undefined ratios (no predicted or no actual positives) score 0, as in scikit-learn
+    numerator, denominator = np.asarray(numerator, dtype=np.float64), np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros(np.broadcast(numerator, denominator).shape),
+                     where=denominator > 0)
+
+
+def metrics_from_counts(tn, fp, fn, tp):
+    """Threshold metrics from confusion counts; works elementwise on arrays of replicates"""
+    precision = _divide(tp, tp + fp)
+    recall = _divide(tp, tp + fn)
+    return {
+        'accuracy': _divide(tp + tn, tp + tn + fp + fn),
+        'precision': precision,
+        'recall': recall,
+        'specificity': _divide(tn, tn + fp),
+        'f1': _divide(2 * precision * recall, precision + recall),
+    }
+
+
+def rank_auc(y_true, y_score):
+    """ROC AUC from the Mann-Whitney rank sum, with tied scores given their average rank"""
+    from scipy.stats import rankdata
+    positive = np.asarray(y_true, dtype=bool)
+    n_pos = positive.sum()
+    n_neg = len(positive) - n_pos
+    if not n_pos or not n_neg:
+        return float('nan')
+    ranks = rankdata(y_score)
+    return float((ranks[positive].sum() - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg))
+
+
+def _grouped_auc(neg, pos):
+    # neg/pos: (replicates, score groups) counts in ascending score order; ties count half
+    negatives_below = np.cumsum(neg, axis=1) - neg
+    wins = (pos * (negatives_below + 0.5 * neg)).sum(axis=1)
+    return _divide(wins, pos.sum(axis=1) * neg.sum(axis=1))
+
+
+class Evaluation:
+    """Labels, predictions and scores from one inference pass, and every metric computed from them"""
+
+    def __init__(self, y_true, y_pred, y_score=None, positive_label=1):
+        self.y_true = np.asarray(y_true) == positive_label
+        self.y_pred = np.asarray(y_pred) == positive_label
+        self.y_score = None if y_score is None else np.asarray(y_score, dtype=np.float64)
+
+    @classmethod
+    def from_model(cls, model, X, y_true, positive_label=1):
+        y_pred, y_score = predict_once(model, X)
+        return cls(y_true, y_pred, y_score, positive_label)
+
+    def confusion(self):
+        """(tn, fp, fn, tp) from one bincount"""
+        return tuple(int(count) for count in np.bincount(2 * self.y_true + self.y_pred, minlength=4))
+
+    def metrics(self):
+        results = {name: float(value) for name, value in metrics_from_counts(*self.confusion()).items()}
+        score = self.y_pred if self.y_score is None else self.y_score
+        results['roc_auc'] = rank_auc(self.y_true, score)
+        return results
+
+    def _cells(self, max_bins):
+        score = self.y_pred.astype(np.float64) if self.y_score is None else self.y_score
+        levels, bins = np.unique(score, return_inverse=True)
+        if len(levels) > max_bins:
+            edges = np.unique(np.quantile(score, np.linspace(0, 1, max_bins + 1)[1:-1]))
+            bins = np.searchsorted(edges, score, side='right')
+        n_bins = int(bins.max()) + 1
+        cells = (bins.ravel() * 2 + self.y_true) * 2 + self.y_pred
+        return np.bincount(cells, minlength=n_bins * 4), n_bins
+
+    def bootstrap(self, n_boot=DEFAULT_BOOTSTRAPS, alpha=0.05, seed=42, max_bins=MAX_SCORE_BINS,
+                  block=BOOTSTRAP_BLOCK):
+        """Percentile confidence intervals: metric -> (low, high), from n_boot resamples drawn in blocks"""
+        rng = np.random.default_rng(seed)
+        counts, n_bins = self._cells(max_bins)
+        n = int(counts.sum())
+        frequencies = counts / n
+        replicates = {name: [] for name in METRICS}
+        for start in range(0, n_boot, block):
+            draws = rng.multinomial(n, frequencies, size=min(block, n_boot - start)).reshape(-1, n_bins, 2, 2)
+            confusion = draws.sum(axis=1)
+            for name, values in metrics_from_counts(confusion[:, 0, 0], confusion[:, 0, 1],
+                                                    confusion[:, 1, 0], confusion[:, 1, 1]).items():
+                replicates[name].append(values)
+            by_label = draws.sum(axis=3)
+            replicates['roc_auc'].append(_grouped_auc(by_label[:, :, 0], by_label[:, :, 1]))
+        return {name: tuple(float(q) for q in np.percentile(np.concatenate(values), [100 * alpha / 2,
+                                                                                     100 * (1 - alpha / 2)]))
+                for name, values in replicates.items()}
+
+    def report(self, n_boot=DEFAULT_BOOTSTRAPS, alpha=0.05, seed=42):
+        """metric -> {'value', 'low', 'high'}"""
+        intervals = self.bootstrap(n_boot, alpha, seed) if n_boot else {}
+        return {name: {'value': value, 'low': intervals.get(name, (None, None))[0],
+                       'high': intervals.get(name, (None, None))[1]}
+                for name, value in self.metrics().items()}
@@ -0,0 +1,147 @@
+# explain.py
+import weakref
+
+import numpy as np
+
+from compiled import ROW_BLOCK
+from schema import FEATURE_COLUMNS
+from scoring import MAX_SCORE, feature_points
+
+# Attributions are a patients x features matrix whose rows sum, with the base
+# value, to the engine's output: clinical points for the rules, the exact
+# log-odds decomposition for linear models, and Saabas path contributions
+# (the change in leaf probability at each split) for trees. All three are
+# computed column- or level-wise over the whole batch, never per patient.
+
+DEFAULT_TOP_FACTORS = 3
+UNIT_RISK = '% risk'
+UNIT_LOG_ODDS = 'log-odds'
+UNIT_DECISION = 'decision score'
+# Path contribution tables, built once per compiled forest
+_PATH_TABLES = weakref.WeakKeyDictionary()
+
+
+class ExplanationUnavailable(Exception):
+    """The model or its transforms have no attribution method, e.g. trees over PCA components"""
+
+
+class Attribution:
+    """Per-patient feature contributions; base + contributions.sum(axis=1) is the explained output"""
+
+    def __init__(self, contributions, base, unit):
+        self.contributions = contributions
+        self.base = base
+        self.unit = unit
+
+    def totals(self):
+        return self.base + self.contributions.sum(axis=1)
+
+
+def rule_attributions(columns):
+    """Clinical score points of every feature, as percentage points of risk before the 5-95% clip"""
+    contributions = np.column_stack([feature_points(name, columns[name]) for name in FEATURE_COLUMNS])
+    return Attribution(contributions * (100 / MAX_SCORE), 0.0, UNIT_RISK)
+
+
+def _source_features(compiled):
+    # Original column behind each transformed feature; None once PCA mixes them
+    index = np.arange(len(FEATURE_COLUMNS))
+    for i, step in enumerate(compiled.spec['steps']):
+        if step['type'] == 'select':
+            index = index[compiled.arrays[f'step{i}_indices']]
+        elif step['type'] == 'pca':
+            return None
+    return index
+
+
+def linear_attributions(compiled, X):
+    """Exact decomposition of a linear model's decision score over the original features
+
+    Scaling, selection and PCA are all affine, so the whole pipeline folds into one
+    weight per original column; contributions are measured from the training mean.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    n_features = len(FEATURE_COLUMNS)
+    offset = compiled.transform(np.zeros((1, n_features)))
+    weights = (compiled.transform(np.eye(n_features)) - offset) @ compiled.arrays['coef']
+    steps = compiled.spec['steps']
+    reference = compiled.arrays['step0_mean'] if steps and steps[0]['type'] == 'scale' else np.zeros(n_features)
+    base = float(weights @ reference + offset[0] @ compiled.arrays['coef'] + compiled.arrays['intercept'][0])
+    unit = UNIT_LOG_ODDS if compiled.spec['model']['link'] == 'logistic' else UNIT_DECISION
+    return Attribution((X - reference) * weights, base, unit)
+
+
+def path_contributions(compiled, n_features):
+    """Saabas contributions summed along the path to every node of a compiled forest: (nodes, features)
+
+    A row's attribution for one tree is the row of the leaf it lands in, so explaining
+    a batch costs one leaf lookup per (row, tree) pair, the same walk as scoring.
+    """
+    a = compiled.arrays
+    table = np.zeros((len(a['left']), n_features))
+    frontier = a['roots']
+    while frontier.size:
+        frontier = frontier[a['left'][frontier] != -1]
+        features = a['feature'][frontier]
+        children = (a['left'][frontier], a['right'][frontier])
+        for child in children:
+            table[child] = table[frontier]
+            table[child, features] += a['value'][child] - a['value'][frontier]
+        frontier = np.concatenate(children)
+    return table
+
+
+def tree_attributions(compiled, X, leaves=None):
+    """Saabas contributions: each split's change in positive-class probability goes to its feature
+
+    leaves: optional (rows, trees) flat node ids, e.g. from the fitted forest's apply().
+    """
+    source = _source_features(compiled)
+    if source is None:
+        raise ExplanationUnavailable("Tree attributions need the model's inputs to be original features, "
+                                     "not PCA components")
+    a = compiled.arrays
+    if compiled not in _PATH_TABLES:
+        _PATH_TABLES[compiled] = path_contributions(compiled, len(source))
+    table = _PATH_TABLES[compiled]
+    n_trees = len(a['roots'])
+    if leaves is None:
+        # Same float32 comparison as CompiledModel._forest_proba
+        X = compiled.transform(X).astype(np.float32)
+    contributions = np.zeros((len(X), len(FEATURE_COLUMNS)))
+    for start in range(0, len(X), ROW_BLOCK):
+        if leaves is None:
+            block = X[start:start + ROW_BLOCK]
+            nodes = compiled.forest_leaves(block).reshape(len(block), n_trees)
+        else:
+            nodes = leaves[start:start + ROW_BLOCK]
+        totals = table[nodes[:, 0]]
+        for tree in range(1, n_trees):
+            totals += table[nodes[:, tree]]
+        contributions[start:start + len(nodes), source] = totals
+    scale = 100 / n_trees
+    return Attribution(contributions * scale, float(a['value'][a['roots']].mean() * 100), UNIT_RISK)
+
+
+def explain_compiled(compiled, X, leaves=None):
+    if compiled.spec['model']['type'] == 'forest':
+        return tree_attributions(compiled, X, leaves)
+    return linear_attributions(compiled, X)
+
+
+def top_factors(attribution, k=DEFAULT_TOP_FACTORS):
+    """Frame of the k largest contributions by magnitude per patient: Top_Factor_i and Top_Effect_i columns"""
+    import pandas as pd
+
+    contributions = attribution.contributions
+    k = min(k, contributions.shape[1])
+    order = np.argsort(-np.abs(contributions), axis=1, kind='stable')[:, :k]
+    effects = np.take_along_axis(contributions, order, axis=1)
+    # Features that contributed nothing are left blank rather than named
+    order[effects == 0] = len(FEATURE_COLUMNS)
+    names = pd.array(FEATURE_COLUMNS + [''], dtype='str')
+    columns = {}
+    for i in range(k):
+        columns[f'Top_Factor_{i + 1}'] = names.take(order[:, i])
+        columns[f'Top_Effect_{i + 1}'] = np.round(effects[:, i], 2)
+    return pd.DataFrame(columns)
@@ -0,0 +1,58 @@
+# export.py
+import gzip
+import io
+import os
+import tempfile
+from pathlib import Path
+
+# format -> (label, MIME type, file suffix)
+EXPORT_FORMATS = {
+    'csv': ('CSV', 'text/csv', '.csv'),
+    'csv.gz': ('Gzip-compressed CSV', 'application/gzip', '.csv.gz'),
+    'parquet': ('Parquet', 'application/vnd.apache.parquet', '.parquet'),
+}
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+def iter_csv_chunks(df, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield the frame as encoded CSV, chunk_rows rows at a time, header first"""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, header=start == 0).encode()
+
+
+def write_results(df, fmt, destination, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Write results to a path or binary file object without building the whole CSV in memory"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt!r} (expected one of {', '.join(EXPORT_FORMATS)})")
+    if fmt == 'parquet':
+        df.to_parquet(destination, index=False)
+        return destination
+    out = destination if hasattr(destination, 'write') else open(destination, 'wb')
+    if fmt == 'csv.gz':
+        # Closing the GzipFile flushes the trailer but leaves a caller's fileobj open
+        out = gzip.GzipFile(fileobj=out, mode='wb', compresslevel=6)
+    try:
+        for chunk in iter_csv_chunks(df, chunk_rows):
+            out.write(chunk)
+    finally:
+        if out is not destination:
+            out.close()
+    return destination
+
+
+def export_bytes(df, fmt, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Results encoded in the chosen format; meant to be called lazily, when a download is requested"""
+    buffer = io.BytesIO()
+    write_results(df, fmt, buffer, chunk_rows)
+    return buffer.getvalue()
+
+
+def export_file(df, fmt, path=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Write results chunk by chunk to path (a new private temporary file by default) and return the path"""
+    if path is None:
+        fd, name = tempfile.mkstemp(prefix='heart_export_', suffix=EXPORT_FORMATS[fmt][2])
+        os.close(fd)
+        path = name
+    write_results(df, fmt, path, chunk_rows)
+    return Path(path)
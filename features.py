@@ -1,15 +1,264 @@
 # features.py
-from sklearn.decomposition import PCA
-from sklearn.feature_selection import SelectKBest, f_classif
+import os
+from pathlib import Path
 
-def apply_pca(X_train, X_test, n_components=5):
-    pca = PCA(n_components=n_components)
-    X_train_pca = pca.fit_transform(X_train)
-    X_test_pca = pca.transform(X_test)
+import numpy as np
+from sklearn.base import BaseEstimator, clone
+from sklearn.decomposition import PCA, IncrementalPCA
+from sklearn.feature_selection import RFE, SelectKBest, SelectorMixin, chi2, f_classif
+
+from instrumentation import instrumented
+
+PCA_SOLVERS = ('auto', 'full', 'covariance_eigh', 'randomized', 'incremental')
+PCA_BATCH_ROWS = 65_536
+# auto: eigendecomposition of the d x d covariance for tall matrices up to this
+# width, randomized SVD for large matrices where few components are kept, and
+# incremental batches once a fit would take this share of available memory.
+# Available memory is read from the host (SC_AVPHYS_PAGES) at fit time, so the
+# same data can get a different solver on a busier machine; pass a fixed solver,
+# e.g. 'full', where fits must be reproducible across hosts.
+COVARIANCE_MAX_FEATURES = 1000
+RANDOMIZED_MIN_DIMENSION = 500
+INCREMENTAL_MEMORY_SHARE = 0.25
+RANKING_METHODS = ('f_classif', 'chi2', 'random_forest', 'rfe')
+
+def _available_memory():
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def choose_pca_solver(n_samples, n_features, n_components=None, itemsize=8, available_bytes=None, on_disk=False):
+    available_bytes = _available_memory() if available_bytes is None else available_bytes
+    # 'mle' and variance fractions are only understood by the exact solvers
+    counted = n_components is None or isinstance(n_components, (int, np.integer))
+    # A full or randomized fit holds the centred matrix plus SVD workspace, about three copies
+    in_memory_bytes = 3 * n_samples * n_features * itemsize
+    if counted and (on_disk or (available_bytes is not None
+                                and in_memory_bytes > INCREMENTAL_MEMORY_SHARE * available_bytes)):
+        return 'incremental'
+    if n_features <= COVARIANCE_MAX_FEATURES and n_samples >= 10 * n_features:
+        return 'covariance_eigh'
+    if (counted and n_components is not None and min(n_samples, n_features) > RANDOMIZED_MIN_DIMENSION
+            and n_components < 0.8 * min(n_samples, n_features)):
+        return 'randomized'
+    return 'full'
+
+def _iter_rows(X, batch_size, dtype=np.float64):
+    for start in range(0, X.shape[0], batch_size):
+        yield np.asarray(X[start:start + batch_size], dtype=dtype)
+
+def _batch_dtype(X, low_memory):
+    # low_memory keeps float32 inputs in float32; everything else is computed in float64
+    return np.float32 if low_memory and X.dtype == np.float32 else np.float64
+
+def _transform(pca, X, batch_size, low_memory=False):
+    # Row batches keep a memory-mapped input from being read into memory whole
+    if isinstance(X, np.memmap):
+        dtype = _batch_dtype(X, low_memory)
+        output = np.empty((X.shape[0], pca.n_components_), dtype=dtype)
+        for start, batch in zip(range(0, X.shape[0], batch_size), _iter_rows(X, batch_size, dtype)):
+            output[start:start + len(batch)] = pca.transform(batch)
+        return output
+    return pca.transform(X)
+
+def _truncate(pca, n_components):
+    # The leading components of a wider fit are the fit at fewer components
+    pca.components_ = pca.components_[:n_components]
+    pca.explained_variance_ = pca.explained_variance_[:n_components]
+    pca.explained_variance_ratio_ = pca.explained_variance_ratio_[:n_components]
+    pca.singular_values_ = pca.singular_values_[:n_components]
+    pca.n_components_ = n_components
+    return pca
+
+def explained_variance_curve(pca):
+    """Cumulative explained variance ratio of a fitted PCA, one entry per component"""
+    return np.cumsum(pca.explained_variance_ratio_)
+
+def components_for_variance(curve, threshold):
+    """Smallest number of components whose cumulative explained variance exceeds threshold, as PCA(n_components=float)"""
+    # side='right' as in scikit-learn, so a component that lands exactly on the threshold does not end the count
+    return int(min(np.searchsorted(curve, threshold, side='right') + 1, len(curve)))
+
+def fit_pca(X, n_components=None, solver='auto', batch_size=PCA_BATCH_ROWS, random_state=42, low_memory=False):
+    """Fit one decomposition; X may be an array, a memmap or a .npy path (streamed in batches)
+
+    solver='auto' depends on the host's free memory, see choose_pca_solver.
+    """
+    if isinstance(X, (str, Path)):
+        X = np.load(X, mmap_mode='r')
+    n_samples, n_features = X.shape
+    if solver == 'auto':
+        solver = choose_pca_solver(n_samples, n_features, n_components, X.dtype.itemsize,
+                                   on_disk=isinstance(X, np.memmap))
+    if solver == 'incremental':
+        if not (n_components is None or isinstance(n_components, (int, np.integer))):
+            raise ValueError(f"The incremental PCA solver needs a whole number of components, not {n_components!r}; "
+                             "use solver='full' for 'mle' or a variance target")
+        # Every partial_fit batch needs at least n_components rows, so a short tail joins the batch before it
+        minimum = n_components or n_features
+        batch_size = max(batch_size, minimum)
+        bounds = list(range(0, n_samples, batch_size)) + [n_samples]
+        if len(bounds) > 2 and bounds[-1] - bounds[-2] < minimum:
+            del bounds[-2]
+        pca = IncrementalPCA(n_components=n_components, batch_size=batch_size)
+        dtype = _batch_dtype(X, low_memory)
+        for start, stop in zip(bounds, bounds[1:]):
+            pca.partial_fit(np.asarray(X[start:stop], dtype=dtype))
+        return pca
+    if solver in ('full', 'covariance_eigh', 'randomized'):
+        return PCA(n_components=n_components, svd_solver=solver, random_state=random_state).fit(X)
+    raise ValueError(f"Unknown PCA solver: {solver!r} (expected one of {', '.join(PCA_SOLVERS)})")
+
+@instrumented()
+def apply_pca(X_train, X_test, n_components=5, cache=None, solver='auto', batch_size=PCA_BATCH_ROWS,
+              low_memory=False):
+    # A float n_components below 1 is a variance target: one fit over all components, then truncated by
+    # the curve; None and 'mle' go to the decomposition as they are. solver='auto' depends on free host
+    # memory (see choose_pca_solver). low_memory keeps float32 inputs in float32, including memory-mapped batches.
+    if isinstance(X_train, (str, Path)):
+        X_train = np.load(X_train, mmap_mode='r')
+    if cache is not None:
+        params = {'n_components': n_components, 'solver': solver, 'batch_size': batch_size}
+        if low_memory:
+            params['low_memory'] = True
+        return cache.get_or_compute('apply_pca', params, (X_train, X_test),
+                                    lambda: apply_pca(X_train, X_test, n_components, solver=solver,
+                                                      batch_size=batch_size, low_memory=low_memory))
+    if isinstance(n_components, float) and 0 < n_components < 1:
+        pca = fit_pca(X_train, None, solver, batch_size, low_memory=low_memory)
+        _truncate(pca, components_for_variance(explained_variance_curve(pca), n_components))
+    else:
+        pca = fit_pca(X_train, n_components, solver, batch_size, low_memory=low_memory)
+    X_train_pca = _transform(pca, X_train, batch_size, low_memory)
+    X_test_pca = _transform(pca, X_test, batch_size, low_memory)
     return X_train_pca, X_test_pca, pca
 
-def select_features(X_train, y_train, X_test, k=5):
-    selector = SelectKBest(score_func=f_classif, k=k)
+def _ranking_scores(X, y, method, random_state=42):
+    # Higher is better for every method, so top-k is always the k largest scores
+    if method == 'f_classif':
+        return f_classif(X, y)[0]
+    if method == 'chi2':
+        # chi2 needs non-negative inputs; min-max scaling keeps each feature's ordering
+        from sklearn.preprocessing import MinMaxScaler
+        return chi2(MinMaxScaler().fit_transform(X), y)[0]
+    if method == 'random_forest':
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(n_estimators=100, random_state=random_state).fit(X, y).feature_importances_
+    if method == 'rfe':
+        # Eliminating down to one feature ranks every feature, so any k is a prefix of one run
+        from sklearn.linear_model import LogisticRegression
+        rfe = RFE(LogisticRegression(max_iter=1000), n_features_to_select=1).fit(X, y)
+        return -rfe.ranking_.astype(np.float64)
+    raise ValueError(f"Unknown ranking method: {method!r} (expected one of {', '.join(RANKING_METHODS)})")
+
+def _clean(scores):
+    return np.nan_to_num(np.asarray(scores, dtype=np.float64), nan=-np.inf)
+
+def _top_k(scores, k):
+    # Same tie-breaking as SelectKBest; k='all' or a k past the feature count keeps every feature
+    n_features = len(scores)
+    k = n_features if k == 'all' else min(k, n_features)
+    return np.sort(np.argsort(_clean(scores), kind='mergesort')[n_features - k:])
+
+class FeatureRanking:
+    """Scores from one ranking method; any top-k subset is read off without refitting"""
+
+    def __init__(self, method, scores):
+        self.method = method
+        self.scores = np.asarray(scores, dtype=np.float64)
+
+    @property
+    def order(self):
+        """Column indices, best feature first"""
+        return np.argsort(-_clean(self.scores), kind='stable')
+
+    def top(self, k):
+        """Column indices of the k best features, in column order"""
+        return _top_k(self.scores, k)
+
+    def selector(self, k):
+        """Unfitted RankedSelector keeping the top k, for pipelines and artifacts"""
+        return RankedSelector(self.scores, k)
+
+class RankedSelector(SelectorMixin, BaseEstimator):
+    """Top-k feature selector over precomputed scores; exports like SelectKBest (see compiled.py)"""
+
+    def __init__(self, scores=None, k=5):
+        self.scores = scores
+        self.k = k
+
+    def fit(self, X, y=None):
+        self.n_features_in_ = len(self.scores)
+        if hasattr(X, 'columns'):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        return self
+
+    def _get_support_mask(self):
+        mask = np.zeros(len(self.scores), dtype=bool)
+        mask[_top_k(self.scores, self.k)] = True
+        return mask
+
+def rank_features(X, y, method='f_classif', cache=None, random_state=42):
+    """Score every feature once with method; cache: optional stage_cache.StageCache"""
+    if cache is not None:
+        scores = cache.get_or_compute('rank_features', {'method': method, 'random_state': random_state}, (X, y),
+                                      lambda: _ranking_scores(X, y, method, random_state))
+    else:
+        scores = _ranking_scores(X, y, method, random_state)
+    return FeatureRanking(method, scores)
+
+def rank_all(X, y, methods=RANKING_METHODS, cache=None, n_jobs=None, random_state=42):
+    """Rankings for several methods, computed in parallel; returns method -> FeatureRanking"""
+    from joblib import Parallel, delayed
+    rankings = Parallel(n_jobs=n_jobs)(delayed(rank_features)(X, y, method, cache, random_state)
+                                       for method in methods)
+    return dict(zip(methods, rankings))
+
+def _rows(X, index):
+    return X.iloc[index] if hasattr(X, 'iloc') else X[index]
+
+def _columns(X, columns):
+    return X.iloc[:, columns] if hasattr(X, 'iloc') else X[:, columns]
+
+def _sweep_fold(estimator, X, y, train, test, ks, method, scoring, random_state):
+    from sklearn.metrics import get_scorer
+    scorer = get_scorer(scoring)
+    X_train, X_test = _rows(X, train), _rows(X, test)
+    ranking = rank_features(X_train, _rows(y, train), method, random_state=random_state)
+    scores = {}
+    for k in ks:
+        columns = ranking.top(k)
+        model = clone(estimator).fit(_columns(X_train, columns), _rows(y, train))
+        scores[k] = scorer(model, _columns(X_test, columns), _rows(y, test))
+    return scores
+
+def sweep_k(estimator, X, y, ks=None, method='f_classif', cv=5, scoring='accuracy', n_jobs=None, random_state=42):
+    """Cross-validated score for every k in one CV loop: features are ranked once per fold, not once per k
+
+    Returns (best k, {k: mean score}).
+    """
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import check_cv
+
+    ks = list(range(1, X.shape[1] + 1)) if ks is None else list(ks)
+    splitter = check_cv(cv, y, classifier=True)
+    fold_scores = Parallel(n_jobs=n_jobs)(
+        delayed(_sweep_fold)(estimator, X, y, train, test, ks, method, scoring, random_state)
+        for train, test in splitter.split(X, y))
+    mean_scores = {k: float(np.mean([scores[k] for scores in fold_scores])) for k in ks}
+    return max(ks, key=lambda k: (mean_scores[k], -k)), mean_scores
+
+@instrumented()
+def select_features(X_train, y_train, X_test, k=5, cache=None, method='f_classif'):
+    if cache is not None:
+        params = {'k': k} if method == 'f_classif' else {'k': k, 'method': method}
+        return cache.get_or_compute('select_features', params, (X_train, y_train, X_test),
+                                    lambda: select_features(X_train, y_train, X_test, k, method=method))
+    if method == 'f_classif':
+        selector = SelectKBest(score_func=f_classif, k=k)
+    else:
+        selector = RankedSelector(rank_features(X_train, y_train, method).scores, k)
     X_train_new = selector.fit_transform(X_train, y_train)
     X_test_new = selector.transform(X_test)
     return X_train_new, X_test_new, selector
@@ -0,0 +1,102 @@
+# incremental.py
+import argparse
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.preprocessing import StandardScaler
+
+from data_prep import iter_data
+from models import get_incremental_models
+from schema import FEATURE_COLUMNS, TARGET_COLUMN
+from train_save import load_model, save_model
+
+CLASSES = np.array([0, 1])
+
+
+def iter_xy(file_path, chunksize=100_000, target_col=TARGET_COLUMN, test_every=5, holdout=False):
+    """Yield (X, y) chunks, keeping every test_every-th row out of training (or only those when holdout=True)"""
+    offset = 0
+    for chunk in iter_data(file_path, chunksize, columns=FEATURE_COLUMNS + [target_col], compact=True):
+        rows = np.arange(offset, offset + len(chunk))
+        offset += len(chunk)
+        mask = rows % test_every == 0 if test_every else np.zeros(len(chunk), dtype=bool)
+        if not holdout:
+            mask = ~mask
+        if mask.any():
+            yield (chunk[FEATURE_COLUMNS].to_numpy(dtype=np.float32)[mask],
+                   chunk[target_col].to_numpy()[mask])
+
+
+def fit_scaler(file_path, chunksize=100_000, test_every=5, scaler=None):
+    """Fit (or keep updating) a StandardScaler one chunk at a time"""
+    scaler = scaler if scaler is not None else StandardScaler()
+    for X, _ in iter_xy(file_path, chunksize, test_every=test_every):
+        scaler.partial_fit(X)
+    return scaler
+
+
+def partial_fit_model(model, scaler, file_path, chunksize=100_000, n_epochs=1, test_every=5, random_state=42):
+    rng = np.random.default_rng(random_state)
+    for _ in range(n_epochs):
+        for X, y in iter_xy(file_path, chunksize, test_every=test_every):
+            # SGD converges poorly on sorted registries, so shuffle inside each chunk
+            order = rng.permutation(len(y))
+            model.partial_fit(scaler.transform(X)[order], y[order], classes=CLASSES)
+    return model
+
+
+def train_incremental(file_path, model='sgd_logistic', chunksize=100_000, n_epochs=1, test_every=5,
+                      random_state=42):
+    """Train on a file larger than RAM; returns a (scaler, model) artifact for save_model"""
+    if isinstance(model, str):
+        model = get_incremental_models()[model]
+    model = clone(model)
+    scaler = fit_scaler(file_path, chunksize, test_every)
+    partial_fit_model(model, scaler, file_path, chunksize, n_epochs, test_every, random_state)
+    return scaler, model
+
+
+def update_model(artifact, file_path, chunksize=100_000, n_epochs=1, test_every=5, update_scaler=False,
+                 random_state=42):
+    """Continue training a deployed (scaler, model) artifact on new data without a full refit"""
+    scaler, model = artifact
+    if update_scaler:
+        # Moves the feature space under the existing coefficients; only worth it for drifted data
+        fit_scaler(file_path, chunksize, test_every, scaler)
+    partial_fit_model(model, scaler, file_path, chunksize, n_epochs, test_every, random_state)
+    return scaler, model
+
+
+def evaluate_incremental(artifact, file_path, chunksize=100_000, test_every=5):
+    """Accuracy on the held-out rows, streamed chunk by chunk"""
+    scaler, model = artifact
+    correct = total = 0
+    for X, y in iter_xy(file_path, chunksize, test_every=test_every, holdout=True):
+        correct += int((model.predict(scaler.transform(X)) == y).sum())
+        total += len(y)
+    return correct / total if total else float('nan')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Out-of-core incremental training')
+    parser.add_argument('command', choices=['train', 'update'])
+    parser.add_argument('data', help='CSV, Parquet, Feather or .npy file with the features and target')
+    parser.add_argument('artifact', help='Model artifact to write (train) or update in place (update)')
+    parser.add_argument('--model', choices=sorted(get_incremental_models()), default='sgd_logistic')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--test-every', type=int, default=5, help='Hold out every n-th row for evaluation')
+    parser.add_argument('--update-scaler', action='store_true')
+    args = parser.parse_args(argv)
+
+    if args.command == 'train':
+        artifact = train_incremental(args.data, args.model, args.chunksize, args.epochs, args.test_every)
+    else:
+        artifact = update_model(load_model(args.artifact), args.data, args.chunksize, args.epochs,
+                                args.test_every, args.update_scaler)
+    save_model(artifact, args.artifact)
+    print(f"Held-out accuracy: {evaluate_incremental(artifact, args.data, args.chunksize, args.test_every):.4f}")
+
+
+if __name__ == '__main__':
+    main()
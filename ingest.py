@@ -0,0 +1,127 @@
+# ingest.py
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from schema import CATEGORY_DOMAINS, COMPACT_DTYPES, FEATURE_COLUMNS, VALUE_RANGES
+
+# Every feature is parsed as float32 first: a category column must be able to
+# hold NaN and out-of-domain codes until validation has flagged them.
+READ_DTYPES = {col: 'float32' for col in FEATURE_COLUMNS}
+
+ERROR_MISSING = 'missing value'
+ERROR_NOT_NUMERIC = 'not a number'
+ERROR_DOMAIN = 'not a valid code'
+ERROR_RANGE = 'out of range'
+
+
+def default_engine():
+    """pyarrow's multithreaded parser when installed, else pandas' C parser"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return 'c'
+    return 'pyarrow'
+
+
+def _rewind(source):
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return source
+
+
+def read_features(source, engine=None):
+    """Read only the feature columns present in a CSV; returns (frame, missing columns, non-numeric mask)
+
+    The non-numeric mask is None when every value parsed as a number.
+    """
+    engine = engine or default_engine()
+    header = pd.read_csv(_rewind(source), nrows=0).columns
+    present = [col for col in FEATURE_COLUMNS if col in header]
+    missing = [col for col in FEATURE_COLUMNS if col not in header]
+    dtypes = {col: READ_DTYPES[col] for col in present}
+    try:
+        return pd.read_csv(_rewind(source), usecols=present, dtype=dtypes, engine=engine), missing, None
+    except ValueError:
+        # Text in a numeric column: re-read with inferred dtypes and coerce only the columns that need it
+        frame = pd.read_csv(_rewind(source), usecols=present, engine=engine)
+    non_numeric = pd.DataFrame(False, index=frame.index, columns=present)
+    for col in present:
+        if not pd.api.types.is_numeric_dtype(frame[col]):
+            coerced = pd.to_numeric(frame[col], errors='coerce')
+            non_numeric[col] = frame[col].notna().to_numpy() & coerced.isna().to_numpy()
+            frame[col] = coerced
+    return frame.astype(dtypes), missing, non_numeric
+
+
+def validate(frame, non_numeric=None):
+    """Vectorized checks of every present feature column; returns (valid row mask, long-format error frame)
+
+    Each error row names the file row (0-based, header excluded), column, offending value and reason.
+    """
+    columns = [col for col in FEATURE_COLUMNS if col in frame.columns]
+    valid = np.ones(len(frame), dtype=bool)
+    rows, cols, values, reasons = [], [], [], []
+    for col in columns:
+        values_col = frame[col].to_numpy()
+        missing = np.isnan(values_col)
+        checks = []
+        if non_numeric is not None and col in non_numeric:
+            bad_text = non_numeric[col].to_numpy()
+            checks += [(bad_text, ERROR_NOT_NUMERIC), (missing & ~bad_text, ERROR_MISSING)]
+        else:
+            checks.append((missing, ERROR_MISSING))
+        if col in CATEGORY_DOMAINS:
+            checks.append((~missing & ~np.isin(values_col, CATEGORY_DOMAINS[col]), ERROR_DOMAIN))
+        if col in VALUE_RANGES:
+            low, high = VALUE_RANGES[col]
+            checks.append((~missing & ((values_col < low) | (values_col > high)), ERROR_RANGE))
+        for mask, reason in checks:
+            index = np.flatnonzero(mask)
+            if index.size:
+                valid[index] = False
+                rows.append(index)
+                cols.append(np.full(index.size, col, dtype=object))
+                values.append(values_col[index].astype(np.float64))
+                reasons.append(np.full(index.size, reason, dtype=object))
+    if rows:
+        errors = pd.DataFrame({
+            'row': np.concatenate(rows),
+            'column': np.concatenate(cols),
+            'value': np.concatenate(values),
+            'error': np.concatenate(reasons),
+        }).sort_values(['row', 'column'], kind='stable', ignore_index=True)
+    else:
+        errors = pd.DataFrame({'row': np.array([], dtype=np.intp), 'column': np.array([], dtype=object),
+                               'value': np.array([], dtype=np.float64), 'error': np.array([], dtype=object)})
+    return valid, errors
+
+
+class IngestResult:
+    """Validated patients in compact dtypes, keeping their file row numbers as the index"""
+
+    def __init__(self, frame, valid, errors, missing_columns, seconds):
+        self.missing_columns = missing_columns
+        self.n_rows = len(frame)
+        self.errors = errors
+        self.n_invalid = int((~valid).sum())
+        frame = frame[valid] if self.n_invalid else frame
+        if not missing_columns:
+            frame = frame.astype({col: COMPACT_DTYPES[col] for col in FEATURE_COLUMNS})
+        self.frame = frame
+        self.seconds = seconds
+
+
+def ingest_csv(source, engine=None):
+    """Typed read of the feature columns plus domain and range validation"""
+    start = time.perf_counter()
+    frame, missing, non_numeric = read_features(source, engine)
+    if missing:
+        valid, errors = np.ones(len(frame), dtype=bool), validate(frame.iloc[:0])[1]
+    else:
+        valid, errors = validate(frame, non_numeric)
+    return IngestResult(frame, valid, errors, missing, time.perf_counter() - start)
@@ -0,0 +1,271 @@
+# instrumentation.py
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+# Stage timing, call counts and optional peak-memory sampling. Off by default:
+# a disabled span or decorated call costs one flag check. Turn it on with
+# HEART_PROFILE=1 (HEART_PROFILE=memory also samples memory) or enable().
+# tracemalloc's peak is process-wide, so memory is only sampled for spans that
+# run while no other thread is inside one; overlapping calls record no peak.
+
+# Upper bounds in seconds, as in the Prometheus client's default histogram
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float('inf'))
+
+
+class StageStats:
+    """Aggregates for one stage: call count, total seconds, histogram buckets and peak memory"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_s = 0.0
+        self.bucket_counts = [0] * len(BUCKETS)
+        self.peak_bytes = 0
+        self.max_s = 0.0
+
+    def record(self, seconds, peak_bytes=None):
+        self.count += 1
+        self.total_s += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+        if peak_bytes is not None:
+            self.peak_bytes = max(self.peak_bytes, peak_bytes)
+        self.max_s = max(self.max_s, seconds)
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total_s': self.total_s,
+            'mean_s': self.total_s / self.count if self.count else 0.0,
+            'max_s': self.max_s,
+            'peak_bytes': self.peak_bytes,
+            'buckets': dict(zip(BUCKETS, self.bucket_counts)),
+        }
+
+
+class _State:
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.log_file = None
+        self.stages = {}
+        # Threads with an open span, and a count of the times one opened while another was busy
+        self.busy_threads = 0
+        self.overlaps = 0
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+
+_state = _State()
+
+
+def enable(memory=False, log_path=None):
+    """Start recording spans; memory=True also samples peak allocations with tracemalloc"""
+    with _state.lock:
+        _state.memory = memory
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if log_path is not None:
+            if _state.log_file is not None:
+                _state.log_file.close()
+            _state.log_file = open(log_path, 'a', buffering=1)
+        _state.enabled = True
+
+
+def disable():
+    with _state.lock:
+        _state.enabled = False
+        if _state.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        _state.memory = False
+        if _state.log_file is not None:
+            _state.log_file.close()
+            _state.log_file = None
+
+
+def is_enabled():
+    return _state.enabled
+
+
+@contextlib.contextmanager
+def recording(memory=False):
+    """Record spans inside the block, then restore the previous enabled and memory settings
+
+    Recorded stages and an open log are left as they are.
+    """
+    with _state.lock:
+        previous = (_state.enabled, _state.memory)
+        started_tracing = memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        _state.memory = _state.memory or memory
+        _state.enabled = True
+    try:
+        yield
+    finally:
+        with _state.lock:
+            _state.enabled, _state.memory = previous
+            if started_tracing and tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+
+def reset():
+    with _state.lock:
+        _state.stages.clear()
+
+
+def _stack():
+    stack = getattr(_state.local, 'stack', None)
+    if stack is None:
+        stack = _state.local.stack = []
+    return stack
+
+
+class _Span:
+    __slots__ = ('name', 'start', 'start_bytes', 'child_peak', 'overlaps', 'seconds', 'peak_bytes')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.child_peak = 0
+        self.overlaps = None
+        stack = _stack()
+        if not stack:
+            with _state.lock:
+                if _state.busy_threads:
+                    _state.overlaps += 1
+                _state.busy_threads += 1
+        if _state.memory and _state.busy_threads == 1:
+            # Sampled only while this thread is the only one in a span: reset_peak() is process-wide
+            self.overlaps = _state.overlaps
+            self.start_bytes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        stack = _stack()
+        stack.pop()
+        peak_bytes = None
+        if self.overlaps == _state.overlaps and tracemalloc.is_tracing():
+            # reset_peak() in a nested span clears the outer peak, so children report theirs upwards
+            peak = max(tracemalloc.get_traced_memory()[1], self.child_peak)
+            peak_bytes = peak - self.start_bytes
+            if stack:
+                stack[-1].child_peak = max(stack[-1].child_peak, peak)
+        if not stack:
+            with _state.lock:
+                _state.busy_threads -= 1
+        # Kept on the span too, so a caller can read this one call's figures
+        self.seconds, self.peak_bytes = seconds, peak_bytes
+        _record(self.name, seconds, peak_bytes)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _record(name, seconds, peak_bytes):
+    with _state.lock:
+        stats = _state.stages.get(name)
+        if stats is None:
+            stats = _state.stages[name] = StageStats()
+        stats.record(seconds, peak_bytes)
+        if _state.log_file is not None:
+            event = {'ts': time.time(), 'stage': name, 'seconds': seconds}
+            if peak_bytes is not None:
+                event['peak_bytes'] = peak_bytes
+            _state.log_file.write(json.dumps(event) + '\n')
+
+
+def span(name):
+    """Context manager timing a block under name; a no-op while disabled"""
+    if not _state.enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def instrumented(name=None):
+    """Decorator recording each call of a function as a span (module.function by default)"""
+    def decorator(fn):
+        stage = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return fn(*args, **kwargs)
+            stack = _stack()
+            if stack and stack[-1].name == stage:
+                # Re-entrant call, e.g. a cached stage computing itself on a miss: count it once
+                return fn(*args, **kwargs)
+            with _Span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    """Stage name -> aggregate dict, for the admin view and exporters"""
+    with _state.lock:
+        return {name: stats.as_dict() for name, stats in _state.stages.items()}
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def prometheus_text(prefix='heart'):
+    """All stages in the Prometheus text exposition format"""
+    lines = [
+        f'# HELP {prefix}_stage_seconds Wall time per pipeline stage call.',
+        f'# TYPE {prefix}_stage_seconds histogram',
+    ]
+    stages = snapshot()
+    for name, stats in sorted(stages.items()):
+        cumulative = 0
+        for bound, count in stats['buckets'].items():
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{_label(name)}",le="{le}"}} {cumulative}')
+        lines.append(f'{prefix}_stage_seconds_sum{{stage="{_label(name)}"}} {stats["total_s"]!r}')
+        lines.append(f'{prefix}_stage_seconds_count{{stage="{_label(name)}"}} {stats["count"]}')
+    lines += [
+        f'# HELP {prefix}_stage_peak_memory_bytes Largest traced allocation peak in a stage call (single-threaded calls only).',
+        f'# TYPE {prefix}_stage_peak_memory_bytes gauge',
+    ]
+    for name, stats in sorted(stages.items()):
+        lines.append(f'{prefix}_stage_peak_memory_bytes{{stage="{_label(name)}"}} {stats["peak_bytes"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_jsonl(path):
+    """Append one JSON line per stage with its current aggregates"""
+    now = time.time()
+    with open(path, 'a') as f:
+        for name, stats in snapshot().items():
+            stats = dict(stats, buckets={('+Inf' if b == float('inf') else b): c for b, c in stats['buckets'].items()})
+            f.write(json.dumps({'ts': now, 'stage': name, **stats}) + '\n')
+
+
+_mode = os.environ.get('HEART_PROFILE', '').strip().lower()
+if _mode and _mode not in ('0', 'false', 'no', 'off'):
+    enable(memory=_mode == 'memory', log_path=os.environ.get('HEART_PROFILE_LOG') or None)
@@ -1,17 +1,94 @@
 # models.py
-from sklearn.linear_model import LogisticRegression
+import numpy as np
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.svm import SVC
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import Pipeline
+from sklearn.svm import SVC, LinearSVC
 from sklearn.cluster import KMeans
+from sklearn.utils._param_validation import StrOptions
 
-def get_supervised_models():
+# Exact kernel SVMs scale super-linearly with sample count; above these sizes
+# the registry swaps in an approximate kernel, then a plain linear SVM
+EXACT_SVM_MAX_SAMPLES = 10_000
+KERNEL_APPROX_MAX_SAMPLES = 200_000
+SVM_MODES = ('exact', 'nystroem', 'rff', 'linear')
+# Out-of-fold decision scores the sigmoid is fitted on
+CALIBRATION_FOLDS = 3
+
+def svm_mode(n_samples):
+    if n_samples is None or n_samples <= EXACT_SVM_MAX_SAMPLES:
+        return 'exact'
+    if n_samples <= KERNEL_APPROX_MAX_SAMPLES:
+        return 'nystroem'
+    return 'linear'
+
+class ScaledNystroem(Nystroem):
+    """Nystroem accepting gamma='scale': 1 / (n_features * X.var()) of the data it is fitted on, as SVC uses"""
+    _parameter_constraints = {**Nystroem._parameter_constraints,
+                              'gamma': [StrOptions({'scale'}), *Nystroem._parameter_constraints['gamma']]}
+
+    def fit(self, X, y=None):
+        if self.gamma == 'scale':
+            variance = np.asarray(X, dtype=np.float64).var()
+            self.gamma_ = 1.0 / (np.shape(X)[1] * variance) if variance != 0 else 1.0
+        return super().fit(X, y)
+
+    def _get_kernel_params(self):
+        params = super()._get_kernel_params()
+        if self.gamma == 'scale':
+            params['gamma'] = self.gamma_
+        return params
+
+def _calibrated(estimator, random_state=42):
+    # ensemble=False: the sigmoid is fitted on 3-fold out-of-fold scores and the
+    # SVM itself is refitted once on all rows, instead of SVC(probability=True)'s
+    # 5-fold Platt scaling on top of the real fit
+    folds = StratifiedKFold(n_splits=CALIBRATION_FOLDS, shuffle=True, random_state=random_state)
+    return CalibratedClassifierCV(estimator, method='sigmoid', cv=folds, ensemble=False)
+
+def get_svm(mode='exact', n_components=100, random_state=42):
+    """A sigmoid-calibrated SVM; the SVM is the 'estimator' parameter, so grids name e.g. 'estimator__C'
+
+    Pipelined modes nest one level further: 'estimator__linearsvc__C', 'estimator__nystroem__gamma'.
+    """
+    if mode == 'exact':
+        return _calibrated(SVC(), random_state)
+    # gamma='scale' is resolved from the data at fit time, so it follows PCA or k-selected inputs like SVC's does
+    if mode == 'nystroem':
+        kernel = ScaledNystroem(gamma='scale', n_components=n_components, random_state=random_state)
+        return _calibrated(Pipeline([('nystroem', kernel), ('linearsvc', LinearSVC())]), random_state)
+    if mode == 'rff':
+        kernel = RBFSampler(gamma='scale', n_components=n_components, random_state=random_state)
+        return _calibrated(Pipeline([('rbfsampler', kernel), ('linearsvc', LinearSVC())]), random_state)
+    if mode == 'linear':
+        return _calibrated(LinearSVC(), random_state)
+    raise ValueError(f"Unknown SVM mode: {mode!r} (expected one of {', '.join(SVM_MODES)})")
+
+def get_supervised_models(n_samples=None):
+    # n_samples picks the SVM mode; None keeps the exact kernel SVC
     return {
         'logistic_regression': LogisticRegression(max_iter=1000),
         'random_forest': RandomForestClassifier(),
-        'svm': SVC(probability=True)
+        'svm': get_svm(svm_mode(n_samples))
+    }
+
+def get_incremental_models():
+    # Learners with partial_fit, for training on data streamed in chunks
+    return {
+        'sgd_logistic': SGDClassifier(loss='log_loss', random_state=42),
+        'sgd_linear_svm': SGDClassifier(loss='hinge', random_state=42),
+        'sgd_modified_huber': SGDClassifier(loss='modified_huber', random_state=42)
     }
 
 def get_unsupervised_models():
+    # Imported here: clustering pulls in data_prep, which the supervised path does not need
+    from clustering import PrototypeHierarchical, make_kmeans, make_minibatch_kmeans
     return {
-        'kmeans': KMeans(n_clusters=2, random_state=42)
+        'kmeans': KMeans(n_clusters=2, random_state=42),
+        'kmeans_elkan': make_kmeans(2, algorithm='elkan'),
+        'minibatch_kmeans': make_minibatch_kmeans(2),
+        'hierarchical': PrototypeHierarchical(n_clusters=2)
     }
@@ -0,0 +1,139 @@
+# orchestrator.py
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+from models import get_supervised_models, get_unsupervised_models
+
+# Datasets are written to .npy once and memory-mapped read-only by every
+# worker, so the OS page cache holds a single copy however many models train
+# at once; only the (unfitted, tiny) estimators are pickled to the pool.
+
+DATASET_NAMES = ('X_train', 'y_train', 'X_test', 'y_test')
+
+_worker_data = {}
+
+
+def share_arrays(arrays, directory):
+    """Save each array as .npy under directory; returns name -> path"""
+    paths = {}
+    for name, array in arrays.items():
+        paths[name] = str(Path(directory) / f'{name}.npy')
+        np.save(paths[name], np.ascontiguousarray(array))
+    return paths
+
+
+def _init_worker(paths, threads_per_worker):
+    # Cap BLAS/OpenMP threads so workers * threads never oversubscribes the host
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(threads_per_worker)
+    _worker_data.update({name: np.load(path, mmap_mode='r') for name, path in paths.items()})
+    _worker_data['threads'] = threads_per_worker
+
+
+def _fit_one(name, kind, estimator):
+    from joblib import parallel_config
+
+    data = _worker_data
+    # Estimators left at n_jobs=None (e.g. random forests) use the worker's share of cores
+    with parallel_config(backend='threading', n_jobs=data['threads']):
+        start = time.perf_counter()
+        if kind == 'supervised':
+            estimator.fit(data['X_train'], data['y_train'])
+        else:
+            estimator.fit(data['X_train'])
+        fit_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if kind == 'supervised':
+            from evaluation import predict_once
+            predicted, scores = predict_once(estimator, data['X_test'])
+        else:
+            predicted = estimator.predict(data['X_test'])
+        predict_s = time.perf_counter() - start
+
+    row = {'model': name, 'kind': kind}
+    if kind == 'supervised':
+        from evaluation import Evaluation
+        metrics = Evaluation(data['y_test'], predicted, scores).metrics()
+        row.update(metric='accuracy', score=metrics['accuracy'], f1=metrics['f1'], roc_auc=metrics['roc_auc'])
+    else:
+        from clustering import agreement_report
+        row.update(metric='ari', score=agreement_report(data['y_test'], predicted)['ari'])
+    row.update(fit_s=fit_s, predict_us_per_row=predict_s / len(predicted) * 1e6, worker_pid=os.getpid())
+    return row
+
+
+def registered_models(n_samples=None):
+    """(name, kind, estimator) for every model in models.py that the orchestrator trains"""
+    jobs = [(name, 'supervised', model) for name, model in get_supervised_models(n_samples).items()]
+    jobs += [(name, 'unsupervised', model) for name, model in get_unsupervised_models().items()]
+    return jobs
+
+
+def train_all(X_train, y_train, X_test, y_test, jobs=None, n_workers=None, threads_per_worker=None,
+              workdir=None):
+    """Fit and evaluate every job in a process pool; returns (leaderboard rows best first, wall seconds)
+
+    With more cores than models, the spare cores are split between workers as threads.
+    """
+    jobs = registered_models(len(X_train)) if jobs is None else jobs
+    n_cores = os.cpu_count() or 1
+    n_workers = min(n_workers or n_cores, len(jobs))
+    threads_per_worker = threads_per_worker or max(1, n_cores // n_workers)
+    arrays = dict(zip(DATASET_NAMES, (X_train, y_train, X_test, y_test)))
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        paths = share_arrays(arrays, tmp)
+        start = time.perf_counter()
+        with ProcessPoolExecutor(n_workers, initializer=_init_worker,
+                                 initargs=(paths, threads_per_worker)) as pool:
+            futures = [pool.submit(_fit_one, name, kind, estimator) for name, kind, estimator in jobs]
+            rows = [future.result() for future in as_completed(futures)]
+        wall_s = time.perf_counter() - start
+    # Supervised and clustering scores are on different scales, so rank within each kind
+    rows.sort(key=lambda row: (row['kind'] != 'supervised', -row['score']))
+    return rows, wall_s
+
+
+def format_leaderboard(rows, wall_s=None):
+    lines = [f"{'model':28s} {'metric':>8s} {'score':>8s} {'f1':>8s} {'roc_auc':>8s} {'fit s':>9s} "
+             f"{'predict µs/row':>15s}"]
+    for row in rows:
+        extra = ''.join(f" {row[key]:8.4f}" if key in row else f" {'':8s}" for key in ('f1', 'roc_auc'))
+        lines.append(f"{row['model']:28s} {row['metric']:>8s} {row['score']:8.4f}{extra} {row['fit_s']:9.3f} "
+                     f"{row['predict_us_per_row']:15.2f}")
+    if wall_s is not None:
+        fit_total = sum(row['fit_s'] for row in rows)
+        lines.append(f"wall {wall_s:.2f} s for {fit_total:.2f} s of fitting "
+                     f"({fit_total / wall_s:.1f}x effective parallelism)")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    from data_prep import load_data, scale_features, split_data
+    from schema import TARGET_COLUMN
+
+    parser = argparse.ArgumentParser(description='Train every registered model in parallel and print a leaderboard')
+    parser.add_argument('data', help='CSV, Parquet, Feather or .npy file with the features and target')
+    parser.add_argument('--workers', type=int, nargs='+', default=[None],
+                        help='Worker counts to run; several values report scaling (default: all cores)')
+    parser.add_argument('--threads-per-worker', type=int, help='Default: cores divided by workers')
+    args = parser.parse_args(argv)
+
+    X_train, X_test, y_train, y_test = split_data(load_data(args.data, compact=True), TARGET_COLUMN)
+    X_train, X_test, _ = scale_features(X_train, X_test)
+    y_train, y_test = y_train.to_numpy(), y_test.to_numpy()
+    for n_workers in args.workers:
+        rows, wall_s = train_all(X_train, y_train, X_test, y_test, n_workers=n_workers,
+                                 threads_per_worker=args.threads_per_worker)
+        print(f"\n{n_workers or os.cpu_count()} workers")
+        print(format_leaderboard(rows, wall_s))
+
+
+if __name__ == '__main__':
+    main()
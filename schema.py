@@ -0,0 +1,37 @@
+# schema.py
+FEATURE_COLUMNS = ['age', 'sex', 'cp', 'trestbps', 'chol', 'fbs', 'restecg',
+                   'thalach', 'exang', 'oldpeak', 'slope', 'ca', 'thal']
+
+TARGET_COLUMN = 'target'
+
+CATEGORICAL_COLUMNS = ['sex', 'cp', 'fbs', 'restecg', 'exang', 'slope', 'ca', 'thal']
+CONTINUOUS_COLUMNS = ['age', 'trestbps', 'chol', 'thalach', 'oldpeak']
+
+# Small category codes fit in int8 and vitals need no more than float32 precision
+COMPACT_DTYPES = {
+    **{col: 'int8' for col in CATEGORICAL_COLUMNS},
+    **{col: 'float32' for col in CONTINUOUS_COLUMNS},
+    TARGET_COLUMN: 'int8',
+}
+
+# Valid codes for each categorical feature (UCI heart encoding)
+CATEGORY_DOMAINS = {
+    'sex': (0, 1),
+    'cp': (0, 1, 2, 3),
+    'fbs': (0, 1),
+    'restecg': (0, 1, 2),
+    'exang': (0, 1),
+    'slope': (0, 1, 2),
+    'ca': (0, 1, 2, 3, 4),
+    'thal': (0, 1, 2, 3),
+}
+
+# Physiologically plausible (low, high) bounds, inclusive; wider than any
+# real patient so only data-entry errors fall outside
+VALUE_RANGES = {
+    'age': (1, 120),
+    'trestbps': (50, 250),
+    'chol': (50, 700),
+    'thalach': (40, 250),
+    'oldpeak': (-3, 10),
+}
@@ -0,0 +1,203 @@
+# scoring.py
+import numpy as np
+
+from instrumentation import instrumented
+from schema import FEATURE_COLUMNS
+
+HIGH_RISK_RECOMMENDATION = 'Consult Cardiologist Immediately'
+LOW_RISK_RECOMMENDATION = 'Maintain Healthy Lifestyle'
+RISK_CLASSES = np.array(['Low Risk', 'High Risk'], dtype=object)
+RECOMMENDATIONS = np.array([LOW_RISK_RECOMMENDATION, HIGH_RISK_RECOMMENDATION], dtype=object)
+
+# Clinical score tables, one entry per feature in FEATURE_COLUMNS order.
+# ('above', edges, weights): weights[i] applies when exactly i edges are < value
+# ('below', edges, weights): weights[i] applies when exactly i edges are <= value
+# ('equal', {code: weight}): weight applies when value == code
+SCORE_TABLES = {
+    'age': ('above', [40, 50, 60], [0.0, 0.8, 1.5, 2.5]),
+    'sex': ('equal', {1: 0.7}),
+    'cp': ('equal', {3: 2.0, 2: 0.8, 1: 0.3}),
+    'trestbps': ('above', [130, 140], [0.0, 0.6, 1.2]),
+    'chol': ('above', [240, 280], [0.0, 0.7, 1.3]),
+    'fbs': ('equal', {1: 0.8}),
+    'restecg': ('equal', {2: 1.0, 1: 0.5}),
+    'thalach': ('below', [100, 120, 140], [2.0, 1.2, 0.6, 0.0]),
+    'exang': ('equal', {1: 1.5}),
+    'oldpeak': ('above', [1.0, 1.5, 2.0], [0.0, 0.6, 1.2, 1.8]),
+    'slope': ('equal', {2: 1.2, 1: 0.5}),
+    'ca': ('equal', {3: 1.8, 2: 1.0, 1: 0.5}),
+    'thal': ('equal', {3: 1.5, 2: 0.7}),
+}
+
+MAX_SCORE = 15
+
+
+def predict_risk(features):
+    """
+    Enhanced prediction using clinical scoring system
+    """
+    age, sex, cp, trestbps, chol, fbs, restecg, thalach, exang, oldpeak, slope, ca, thal = features
+
+    # Clinical risk score calculation
+    risk_score = 0
+
+    # Age factor
+    if age > 60:
+        risk_score += 2.5
+    elif age > 50:
+        risk_score += 1.5
+    elif age > 40:
+        risk_score += 0.8
+
+    # Sex factor
+    if sex == 1:
+        risk_score += 0.7
+
+    # Chest pain type
+    if cp == 3:
+        risk_score += 2.0
+    elif cp == 2:
+        risk_score += 0.8
+    elif cp == 1:
+        risk_score += 0.3
+
+    # Blood pressure
+    if trestbps > 140:
+        risk_score += 1.2
+    elif trestbps > 130:
+        risk_score += 0.6
+
+    # Cholesterol
+    if chol > 280:
+        risk_score += 1.3
+    elif chol > 240:
+        risk_score += 0.7
+
+    # Fasting blood sugar
+    if fbs == 1:
+        risk_score += 0.8
+
+    # Resting ECG
+    if restecg == 2:
+        risk_score += 1.0
+    elif restecg == 1:
+        risk_score += 0.5
+
+    # Max heart rate
+    if thalach < 100:
+        risk_score += 2.0
+    elif thalach < 120:
+        risk_score += 1.2
+    elif thalach < 140:
+        risk_score += 0.6
+
+    # Exercise angina
+    if exang == 1:
+        risk_score += 1.5
+
+    # Oldpeak
+    if oldpeak > 2.0:
+        risk_score += 1.8
+    elif oldpeak > 1.5:
+        risk_score += 1.2
+    elif oldpeak > 1.0:
+        risk_score += 0.6
+
+    # Slope
+    if slope == 2:
+        risk_score += 1.2
+    elif slope == 1:
+        risk_score += 0.5
+
+    # Vessels
+    if ca == 3:
+        risk_score += 1.8
+    elif ca == 2:
+        risk_score += 1.0
+    elif ca == 1:
+        risk_score += 0.5
+
+    # Thalassemia
+    if thal == 3:
+        risk_score += 1.5
+    elif thal == 2:
+        risk_score += 0.7
+
+    # Normalize to probability
+    probability = min(95, max(5, (risk_score / 15) * 100))
+
+    # Determine class
+    prediction = 1 if probability >= 50 else 0
+
+    return prediction, probability
+
+
+def feature_points(name, values):
+    """Clinical score points for one feature column"""
+    values = np.asarray(values, dtype=np.float64)
+    kind, *table = SCORE_TABLES[name]
+    if kind == 'equal':
+        points = np.zeros(values.shape)
+        for code, weight in table[0].items():
+            points[values == code] = weight
+        return points
+    edges, weights = table
+    side = 'left' if kind == 'above' else 'right'
+    points = np.asarray(weights)[np.searchsorted(edges, values, side=side)]
+    # NaN fails every comparison in predict_risk, so it scores nothing
+    points[np.isnan(values)] = 0.0
+    return points
+
+
+def risk_scores(columns):
+    """Additive clinical score for every row of a column mapping or DataFrame"""
+    scores = None
+    for name in FEATURE_COLUMNS:
+        points = feature_points(name, columns[name])
+        # Accumulate in predict_risk order so the float sums match exactly
+        scores = points if scores is None else scores + points
+    return scores
+
+
+def classify(scores):
+    """Map clinical scores to (classes, probabilities) exactly as predict_risk does"""
+    probabilities = np.clip(scores / MAX_SCORE * 100, 5, 95)
+    classes = (probabilities >= 50).astype(np.int8)
+    return classes, probabilities
+
+
+def predict_arrays(columns):
+    """Vectorized predict_risk: returns (classes, probabilities, recommendations)"""
+    classes, probabilities = classify(risk_scores(columns))
+    return classes, probabilities, RECOMMENDATIONS[classes]
+
+
+def round_probabilities(probabilities, ndigits=2):
+    """Python round() semantics over an array; scores take few distinct values"""
+    unique, inverse = np.unique(probabilities, return_inverse=True)
+    rounded = np.array([round(float(p), ndigits) for p in unique])
+    return rounded[inverse.reshape(-1)]
+
+
+def _labels(values, classes):
+    import pandas as pd
+    # Taking from a two-element string array avoids materialising per-row strings
+    return pd.array(values, dtype='str').take(np.asarray(classes, dtype=np.intp))
+
+
+def results_frame(classes, probabilities, index):
+    """Build the results table shown in the app and written to CSV"""
+    import pandas as pd
+    return pd.DataFrame({
+        'Patient_ID': np.asarray(index) + 1,
+        'Risk_Probability': round_probabilities(np.asarray(probabilities, dtype=np.float64)),
+        'Risk_Class': _labels(RISK_CLASSES, classes),
+        'Recommendation': _labels(RECOMMENDATIONS, classes),
+    })
+
+
+@instrumented()
+def predict_batch(df):
+    """Predict for multiple patients"""
+    classes, probabilities = classify(risk_scores(df))
+    return results_frame(classes, probabilities, df.index)
@@ -0,0 +1,329 @@
+# service.py
+import argparse
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from ingest import read_features, validate
+from instrumentation import prometheus_text, span
+from schema import FEATURE_COLUMNS
+from scoring import results_frame
+from serving import DEFAULT_MODEL_PATH, get_scorer
+
+DEFAULT_WINDOW_MS = 5
+DEFAULT_MAX_BATCH = 256
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyStats:
+    """Rolling request latencies plus request/row throughput since start"""
+
+    def __init__(self, window=10000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._started = time.perf_counter()
+        self.requests = 0
+        self.rows = 0
+
+    def record(self, seconds, rows=1):
+        with self._lock:
+            self._latencies.append(seconds)
+            self.requests += 1
+            self.rows += rows
+
+    def snapshot(self):
+        with self._lock:
+            latencies = np.array(self._latencies)
+            requests, rows = self.requests, self.rows
+        uptime = time.perf_counter() - self._started
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000 if len(latencies) else (0.0, 0.0)
+        return {
+            'requests': requests,
+            'rows': rows,
+            'uptime_s': uptime,
+            'p50_ms': float(p50),
+            'p99_ms': float(p99),
+            'requests_per_s': requests / uptime,
+            'rows_per_s': rows / uptime,
+        }
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-patient requests into one vectorized scorer call"""
+
+    def __init__(self, scorer, window_ms=DEFAULT_WINDOW_MS, max_batch=DEFAULT_MAX_BATCH):
+        self.scorer = scorer
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.batches = 0
+        self.batched_rows = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, features):
+        """Queue one patient (a list of the 13 features); returns a Future of (class, probability)"""
+        future = Future()
+        self._queue.put((features, future))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            frame = pd.DataFrame([features for features, _ in batch], columns=FEATURE_COLUMNS)
+            try:
+                classes, probabilities = self.scorer.predict(frame)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.batched_rows += len(batch)
+            for (_, future), prediction, probability in zip(batch, classes, probabilities):
+                future.set_result((int(prediction), float(probability)))
+
+
+class BadRequest(ValueError):
+    """A client error, answered with 400; anything else raised while handling a request is a 500"""
+
+    def details(self):
+        return {'error': str(self)}
+
+
+class InvalidPatients(BadRequest):
+    """Patients failing ingest.validate; the response lists every error as the upload page does"""
+
+    def __init__(self, errors, n_patients):
+        n_invalid = errors['row'].nunique()
+        super().__init__(f"{n_invalid} of {n_patients} patients have invalid values")
+        self.errors = errors
+
+    def details(self):
+        errors = self.errors.rename(columns={'row': 'Patient_ID'})
+        errors['Patient_ID'] += 1
+        # NaN (a missing value) is not valid JSON
+        errors['value'] = errors['value'].astype(object).where(errors['value'].notna(), None)
+        return {'error': str(self), 'errors': errors.to_dict(orient='records')}
+
+
+def _validated(frame, non_numeric=None):
+    # The same domain and range checks as the app, streaming.py and batch_runner.py
+    valid, errors = validate(frame, non_numeric)
+    if not valid.all():
+        raise InvalidPatients(errors, len(frame))
+    return frame
+
+
+def _patient_features(record):
+    if not isinstance(record, dict):
+        raise BadRequest('Each patient must be a JSON object')
+    missing_cols = [col for col in FEATURE_COLUMNS if col not in record]
+    if missing_cols:
+        raise BadRequest(f"Missing columns: {', '.join(missing_cols)}")
+    try:
+        return [float(record[col]) for col in FEATURE_COLUMNS]
+    except (TypeError, ValueError):
+        raise BadRequest('Feature values must be numeric')
+
+
+def _batch_frame(body, content_type):
+    if content_type.startswith('text/csv'):
+        try:
+            # Text in a feature column is reported per row by validate, as 'not a number'
+            df, missing_cols, non_numeric = read_features(body)
+        except ValueError as e:
+            # Parser errors, including UnicodeDecodeError and pyarrow's ArrowInvalid, are ValueErrors
+            raise BadRequest(f"Could not parse CSV: {e}")
+        if missing_cols:
+            raise BadRequest(f"Missing columns: {', '.join(missing_cols)}")
+        return _validated(df[FEATURE_COLUMNS], non_numeric)
+    payload = _json(body)
+    if isinstance(payload, dict):
+        payload = payload.get('patients')
+    if not isinstance(payload, list):
+        raise BadRequest('Batch payload must be a list of patients or {"patients": [...]}')
+    return _validated(pd.DataFrame([_patient_features(record) for record in payload], columns=FEATURE_COLUMNS))
+
+
+def _json(body):
+    try:
+        return json.loads(body)
+    except ValueError as e:
+        # JSONDecodeError and UnicodeDecodeError are both ValueErrors
+        raise BadRequest(f"Invalid JSON: {e}")
+
+
+class ScoringService:
+    """Transport-independent request handling shared by the HTTP server and InProcessClient"""
+
+    def __init__(self, scorer, window_ms=DEFAULT_WINDOW_MS, max_batch=DEFAULT_MAX_BATCH):
+        self.scorer = scorer
+        self.batcher = MicroBatcher(scorer, window_ms, max_batch)
+        self.stats = LatencyStats()
+
+    def close(self):
+        self.batcher.close()
+
+    def metrics(self):
+        metrics = self.stats.snapshot()
+        metrics.update({
+            'engine': self.scorer.name,
+            'engine_version': self.scorer.version,
+            'batches': self.batcher.batches,
+            'mean_batch_size': self.batcher.batched_rows / self.batcher.batches if self.batcher.batches else 0.0,
+        })
+        return metrics
+
+    def handle(self, method, path, body=b'', content_type='application/json'):
+        """Return (status, content type, response bytes) for one request"""
+        start = time.perf_counter()
+        try:
+            status, response_type, response, rows = self._route(method, path.split('?')[0], body, content_type)
+        except BadRequest as e:
+            return 400, 'application/json', json.dumps(e.details()).encode()
+        except Exception:
+            # A scorer failure must still get a response, or the client just sees the connection drop
+            logger.exception('Error handling %s %s', method, path)
+            return 500, 'application/json', json.dumps({'error': 'Internal error while scoring'}).encode()
+        if rows:
+            self.stats.record(time.perf_counter() - start, rows)
+        return status, response_type, response
+
+    def _route(self, method, path, body, content_type):
+        if method == 'GET' and path == '/health':
+            return 200, 'application/json', json.dumps({'status': 'ok', 'engine': self.scorer.name}).encode(), 0
+        if method == 'GET' and path == '/metrics':
+            return 200, 'application/json', json.dumps(self.metrics()).encode(), 0
+        if method == 'GET' and path == '/metrics/stages':
+            # Per-stage spans; empty unless instrumentation is enabled (HEART_PROFILE=1)
+            return 200, 'text/plain; version=0.0.4', prometheus_text().encode(), 0
+        if method == 'POST' and path == '/predict':
+            features = _patient_features(_json(body))
+            _validated(pd.DataFrame([features], columns=FEATURE_COLUMNS))
+            prediction, probability = self.batcher.submit(features).result()
+            results = results_frame([prediction], [probability], [0]).drop(columns='Patient_ID')
+            return 200, 'application/json', json.dumps(results.to_dict(orient='records')[0]).encode(), 1
+        if method == 'POST' and path == '/predict/batch':
+            df = _batch_frame(body, content_type)
+            with span('service.predict_batch'):
+                classes, probabilities = self.scorer.predict(df)
+            results = results_frame(classes, probabilities, df.index)
+            if content_type.startswith('text/csv'):
+                return 200, 'text/csv', results.to_csv(index=False).encode(), len(df)
+            return 200, 'application/json', json.dumps({'results': results.to_dict(orient='records')}).encode(), len(df)
+        return 404, 'application/json', json.dumps({'error': f'No route for {method} {path}'}).encode(), 0
+
+
+class Response:
+    def __init__(self, status, content_type, body):
+        self.status_code = status
+        self.content_type = content_type
+        self.content = body
+
+    @property
+    def text(self):
+        return self.content.decode()
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class InProcessClient:
+    """Call a ScoringService without a socket, for local testing"""
+
+    def __init__(self, service):
+        self.service = service
+
+    def get(self, path):
+        return Response(*self.service.handle('GET', path))
+
+    def post(self, path, json_body=None, data=b'', content_type='application/json'):
+        if json_body is not None:
+            data = json.dumps(json_body).encode()
+        elif isinstance(data, str):
+            data = data.encode()
+        return Response(*self.service.handle('POST', path, data, content_type))
+
+
+def make_server(service, host='127.0.0.1', port=8000):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _respond(self, status, content_type, body):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._respond(*service.handle('GET', self.path))
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            self._respond(*service.handle('POST', self.path, body, self.headers.get('Content-Type', 'application/json')))
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='HTTP scoring service for heart disease risk')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--engine', choices=['rules', 'model', 'compiled'], default='rules')
+    parser.add_argument('--model', default=str(DEFAULT_MODEL_PATH), help='Trained artifact for --engine model, or exported .npz for --engine compiled')
+    parser.add_argument('--window-ms', type=float, default=DEFAULT_WINDOW_MS,
+                        help='How long to wait for more single-patient requests before scoring a batch')
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH)
+    args = parser.parse_args(argv)
+
+    service = ScoringService(get_scorer(args.engine, args.model), args.window_ms, args.max_batch)
+    server = make_server(service, args.host, args.port)
+    print(f"Serving {service.scorer.name} engine on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+# serving.py
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from instrumentation import instrumented
+from schema import FEATURE_COLUMNS
+from scoring import classify, predict_risk, risk_scores, results_frame
+
+DEFAULT_MODEL_PATH = Path(__file__).resolve().parent / 'models' / 'final_model.pkl'
+
+ENGINES = ('rules', 'model', 'compiled')
+
+# path -> (mtime_ns, scorer): one loaded artifact per path, replaced when the file changes
+_loaded_scorers = {}
+_loaded_lock = threading.Lock()
+
+
+class RuleScorer:
+    """Clinical scoring rules behind the same interface as a trained model"""
+    name = 'rules'
+    version = 'rules-1'
+    load_seconds = 0.0
+
+    def predict(self, df):
+        """Return (classes, probabilities in percent) for a patient frame"""
+        return classify(risk_scores(df))
+
+    def explain(self, df):
+        """explain.Attribution of every patient's score over the 13 features"""
+        from explain import rule_attributions
+        return rule_attributions(df)
+
+
+class ModelScorer:
+    """Trained artifact: a (scaler, model) tuple as written by the training script, or a single estimator"""
+
+    def __init__(self, artifact, path, load_seconds=0.0):
+        if isinstance(artifact, tuple):
+            self.steps = list(artifact[:-1])
+            self.model = artifact[-1]
+        else:
+            self.steps = []
+            self.model = artifact
+        self.path = Path(path)
+        self.name = 'model'
+        self.version = f"model:{self.path.name}:{self.path.stat().st_mtime_ns}"
+        self.load_seconds = load_seconds
+
+    @staticmethod
+    def _inputs(X, estimator):
+        # Estimators fitted on DataFrames warn when handed bare arrays, and vice versa
+        if hasattr(X, 'columns') and not hasattr(estimator, 'feature_names_in_'):
+            return X.to_numpy(dtype=np.float64)
+        return X
+
+    def predict(self, df):
+        """Return (classes, probabilities in percent) for a patient frame"""
+        X = df[FEATURE_COLUMNS]
+        for step in self.steps:
+            X = step.transform(self._inputs(X, step))
+        X = self._inputs(X, self.model)
+        if hasattr(self.model, 'predict_proba'):
+            probabilities = self.model.predict_proba(X)[:, 1] * 100
+        else:
+            probabilities = np.asarray(self.model.predict(X), dtype=np.float64) * 100
+        classes = (probabilities >= 50).astype(np.int8)
+        return classes, probabilities
+
+    def explain(self, df):
+        """explain.Attribution of every patient's output; linear and tree models only"""
+        from compiled import compile_artifact
+        from explain import ExplanationUnavailable, explain_compiled
+        if not hasattr(self, '_compiled'):
+            # The node tables or folded weights are built once per loaded artifact
+            try:
+                self._compiled = compile_artifact((*self.steps, self.model))
+            except TypeError as e:
+                # compile_artifact's TypeError names the step it has no array form for
+                raise ExplanationUnavailable(str(e)) from e
+        leaves = None
+        if self._compiled.spec['model']['type'] == 'forest' and hasattr(self.model, 'apply'):
+            # scikit-learn's compiled tree walk finds the leaves; explain.py only sums their paths
+            X = df[FEATURE_COLUMNS]
+            for step in self.steps:
+                X = step.transform(self._inputs(X, step))
+            leaves = np.asarray(self.model.apply(self._inputs(X, self.model))).reshape(len(df), -1)
+            leaves = leaves + self._compiled.arrays['roots']
+        return explain_compiled(self._compiled, df[FEATURE_COLUMNS].to_numpy(dtype=np.float64), leaves)
+
+
+def _cached_scorer(kind, path, load):
+    # Keyed by path, so a retrained artifact replaces the old scorer instead of accumulating beside it
+    path = Path(path).resolve()
+    mtime_ns = path.stat().st_mtime_ns
+    key = (kind, str(path))
+    with _loaded_lock:
+        cached = _loaded_scorers.get(key)
+        if cached is None or cached[0] != mtime_ns:
+            cached = _loaded_scorers[key] = (mtime_ns, load(str(path)))
+        return cached[1]
+
+
+def _load_model_scorer(path, mmap_mode):
+    from train_save import load_model  # pulls in scikit-learn, so only when a model is requested
+    with open(path, 'rb') as f:
+        if f.read(1) == b'#':
+            raise ValueError(f"{Path(path).name} is a Python script, not a trained artifact; "
+                             "save a (scaler, model) tuple with train_save.save_model")
+    start = time.perf_counter()
+    try:
+        artifact = load_model(path, mmap_mode=mmap_mode)
+    except Exception as e:
+        raise ValueError(f"Could not load model artifact {Path(path).name}: {type(e).__name__}: {e}") from e
+    return ModelScorer(artifact, path, time.perf_counter() - start)
+
+
+def load_model_scorer(path=DEFAULT_MODEL_PATH, mmap_mode='r'):
+    """Load a trained artifact once per process; reloads only when the file changes"""
+    return _cached_scorer(f'model:{mmap_mode}', path, lambda resolved: _load_model_scorer(resolved, mmap_mode))
+
+
+def _load_compiled_scorer(path):
+    from compiled import CompiledScorer
+    return CompiledScorer(path)
+
+
+def get_scorer(engine='rules', model_path=DEFAULT_MODEL_PATH):
+    if engine == 'rules':
+        return RuleScorer()
+    if engine == 'model':
+        return load_model_scorer(model_path)
+    if engine == 'compiled':
+        # model_path points at an .npz written by compiled.export_artifact
+        return _cached_scorer('compiled', model_path, _load_compiled_scorer)
+    raise ValueError(f"Unknown scoring engine: {engine!r} (expected one of {', '.join(ENGINES)})")
+
+
+@instrumented()
+def score_frame(scorer, df, top_factors=0):
+    """Score a patient frame; returns (results table, prediction seconds)
+
+    top_factors > 0 appends each patient's largest contributions (see explain.py).
+    """
+    start = time.perf_counter()
+    classes, probabilities = scorer.predict(df)
+    seconds = time.perf_counter() - start
+    results = results_frame(classes, probabilities, df.index)
+    if top_factors:
+        import pandas as pd
+        from explain import top_factors as factor_frame
+        results = pd.concat([results, factor_frame(scorer.explain(df), top_factors)], axis=1)
+    return results, seconds
+
+
+def predict_one(scorer, features):
+    """Score one patient given the 13 features in order; returns (class, probability, seconds)"""
+    start = time.perf_counter()
+    if isinstance(scorer, RuleScorer):
+        prediction, probability = predict_risk(features)
+    else:
+        import pandas as pd
+        classes, probabilities = scorer.predict(pd.DataFrame([features], columns=FEATURE_COLUMNS))
+        prediction, probability = int(classes[0]), float(probabilities[0])
+    return prediction, probability, time.perf_counter() - start
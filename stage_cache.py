@@ -0,0 +1,103 @@
+# stage_cache.py
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import joblib
+import numpy as np
+import sklearn
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = '.stage_cache'
+DEFAULT_MAX_BYTES = 1 << 30
+
+
+def fingerprint(obj, digest=None):
+    """Hash arrays, DataFrames/Series and plain values by content"""
+    digest = digest or hashlib.blake2b(digest_size=20)
+    if hasattr(obj, 'columns'):
+        digest.update(json.dumps([str(col) for col in obj.columns]).encode())
+        obj = obj.to_numpy()
+    elif hasattr(obj, 'to_numpy'):
+        obj = obj.to_numpy()
+    if isinstance(obj, np.ndarray):
+        array = np.ascontiguousarray(obj)
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        if array.dtype == object:
+            digest.update(repr(array.tolist()).encode())
+        else:
+            digest.update(array.view(np.uint8).reshape(-1))
+    else:
+        digest.update(json.dumps(obj, sort_keys=True, default=repr).encode())
+    return digest
+
+
+class StageCache:
+    """Content-addressed on-disk cache of fitted stages and their outputs, evicted least-recently-used"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, stage, params, arrays):
+        digest = hashlib.blake2b(digest_size=20)
+        fingerprint({'stage': stage, 'params': params, 'sklearn': sklearn.__version__}, digest)
+        for array in arrays:
+            fingerprint(array, digest)
+        return f"{stage}-{digest.hexdigest()}"
+
+    def get_or_compute(self, stage, params, arrays, compute):
+        """Return the cached result for (stage, params, arrays), computing and storing it on a miss"""
+        key = self.key(stage, params, arrays)
+        path = self.directory / f"{key}.joblib"
+        if path.exists():
+            try:
+                result = joblib.load(path)
+            except Exception:
+                logger.warning("stage cache: unreadable entry %s, recomputing", path.name)
+            else:
+                os.utime(path)  # mtime doubles as the LRU clock
+                self.hits += 1
+                logger.info("stage cache hit: %s", key)
+                return result
+        self.misses += 1
+        logger.info("stage cache miss: %s", key)
+        result = compute()
+        tmp_path = path.with_suffix('.tmp')
+        joblib.dump(result, tmp_path)
+        os.replace(tmp_path, path)
+        self.evict()
+        return result
+
+    def entries(self):
+        return sorted(self.directory.glob('*.joblib'), key=lambda entry: entry.stat().st_mtime)
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        entries = self.entries()
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            entry.unlink(missing_ok=True)
+            logger.info("stage cache evicted: %s", entry.stem)
+
+    def clear(self):
+        for entry in self.entries():
+            entry.unlink(missing_ok=True)
+
+    def stats(self):
+        entries = self.entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(entries),
+            'bytes': sum(entry.stat().st_size for entry in entries),
+        }
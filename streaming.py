@@ -0,0 +1,151 @@
+# streaming.py
+import argparse
+import os
+import tempfile
+import weakref
+from pathlib import Path
+
+import pandas as pd
+
+from ingest import validate
+from schema import FEATURE_COLUMNS
+from scoring import classify, risk_scores, results_frame
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+class RunningTotals:
+    """Summary statistics updated chunk by chunk"""
+
+    def __init__(self):
+        self.count = 0
+        self.high_risk = 0
+        self.invalid = 0
+        self.chunks = 0
+        self._age_sum = 0.0
+        self._chol_sum = 0.0
+
+    @property
+    def low_risk(self):
+        return self.count - self.high_risk
+
+    @property
+    def mean_age(self):
+        return self._age_sum / self.count if self.count else float('nan')
+
+    @property
+    def mean_chol(self):
+        return self._chol_sum / self.count if self.count else float('nan')
+
+    def update(self, chunk, classes, invalid=0):
+        self.chunks += 1
+        self.count += len(chunk)
+        self.high_risk += int(classes.sum())
+        self.invalid += invalid
+        self._age_sum += float(chunk['age'].sum())
+        self._chol_sum += float(chunk['chol'].sum())
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'high_risk': self.high_risk,
+            'low_risk': self.low_risk,
+            'invalid': self.invalid,
+            'mean_age': self.mean_age,
+            'mean_chol': self.mean_chol,
+        }
+
+
+def _remove(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class OutputFile:
+    """Private temporary file for one session's streamed results
+
+    mkstemp gives each file a unique name readable only by this process' user; the file
+    is deleted by remove(), when the object is garbage collected, or at interpreter exit.
+    """
+
+    def __init__(self, suffix='.csv'):
+        fd, name = tempfile.mkstemp(prefix='heart_predictions_', suffix=suffix)
+        os.close(fd)
+        self.path = Path(name)
+        self._finalizer = weakref.finalize(self, _remove, name)
+
+    def remove(self):
+        self._finalizer()
+
+
+def validate_chunk(chunk):
+    """Check the schema, coerce to numbers and drop rows failing ingest.validate; returns (valid rows, invalid count)"""
+    missing_cols = [col for col in FEATURE_COLUMNS if col not in chunk.columns]
+    if missing_cols:
+        raise ValueError(f"Missing columns: {', '.join(missing_cols)}")
+    numeric = chunk[FEATURE_COLUMNS]
+    text_cols = [col for col in FEATURE_COLUMNS if not pd.api.types.is_numeric_dtype(numeric[col])]
+    if text_cols:
+        numeric = numeric.assign(**{col: pd.to_numeric(numeric[col], errors='coerce') for col in text_cols})
+    valid, _ = validate(numeric.astype('float64'))
+    return numeric[valid], int((~valid).sum())
+
+
+def score_chunks(source, chunksize=DEFAULT_CHUNKSIZE, scorer=None):
+    """Yield (results, totals) for each chunk of a CSV without loading it whole"""
+    totals = RunningTotals()
+    reader = pd.read_csv(source, chunksize=chunksize, usecols=lambda col: col in FEATURE_COLUMNS)
+    with reader:
+        for chunk in reader:
+            chunk, invalid = validate_chunk(chunk)
+            if scorer is None:
+                classes, probabilities = classify(risk_scores(chunk))
+            else:
+                classes, probabilities = scorer.predict(chunk)
+            totals.update(chunk, classes, invalid)
+            # The chunked reader keeps a running index, so Patient_ID stays the file row number
+            yield results_frame(classes, probabilities, chunk.index), totals
+
+
+def score_csv(source, output, chunksize=DEFAULT_CHUNKSIZE, on_chunk=None, scorer=None):
+    """Score a CSV chunk by chunk, appending results to output as they are produced"""
+    totals = RunningTotals()
+    header = True
+    for results, totals in score_chunks(source, chunksize, scorer):
+        results.to_csv(output, mode='w' if header else 'a', header=header, index=False)
+        header = False
+        if on_chunk is not None:
+            on_chunk(totals)
+    if header:
+        pd.DataFrame(columns=['Patient_ID', 'Risk_Probability', 'Risk_Class', 'Recommendation']).to_csv(output, index=False)
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Stream-score a patient CSV in fixed-size chunks')
+    parser.add_argument('input', help='CSV file with the 13 heart features')
+    parser.add_argument('output', help='Destination CSV for predictions')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--engine', choices=['rules', 'model', 'compiled'], default='rules')
+    parser.add_argument('--model', default=None, help='Trained artifact for --engine model, or exported .npz for --engine compiled')
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args(argv)
+
+    scorer = None
+    if args.engine != 'rules':
+        from serving import DEFAULT_MODEL_PATH, get_scorer
+        scorer = get_scorer(args.engine, args.model or DEFAULT_MODEL_PATH)
+
+    def report(totals):
+        if not args.quiet:
+            print(f"chunk {totals.chunks}: {totals.count} scored, {totals.high_risk} high risk, "
+                  f"{totals.invalid} invalid, mean age {totals.mean_age:.1f}, mean chol {totals.mean_chol:.0f}")
+
+    totals = score_csv(args.input, args.output, args.chunksize, on_chunk=report, scorer=scorer)
+    print(totals.as_dict())
+
+
+if __name__ == '__main__':
+    main()
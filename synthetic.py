@@ -0,0 +1,82 @@
+# synthetic.py
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from schema import COMPACT_DTYPES, FEATURE_COLUMNS, TARGET_COLUMN
+
+# Marginals roughly follow the UCI Cleveland heart data that heart.csv is drawn from
+CATEGORY_PROBABILITIES = {
+    'sex': [0.32, 0.68],
+    'cp': [0.47, 0.17, 0.28, 0.08],
+    'fbs': [0.85, 0.15],
+    'restecg': [0.48, 0.50, 0.02],
+    'exang': [0.67, 0.33],
+    'slope': [0.07, 0.46, 0.47],
+    'ca': [0.58, 0.21, 0.13, 0.07, 0.01],
+    'thal': [0.01, 0.06, 0.55, 0.38],
+}
+
+# (mean, std, low, high)
+VITALS = {
+    'age': (54.4, 9.1, 29, 77),
+    'trestbps': (131.6, 17.5, 94, 200),
+    'chol': (246.3, 51.8, 126, 564),
+    'thalach': (149.6, 22.9, 71, 202),
+}
+
+# Log-odds of heart disease per unit of each feature, centred on the means above
+TARGET_WEIGHTS = {
+    'age': 0.03, 'sex': 0.9, 'cp': 0.45, 'trestbps': 0.012, 'chol': 0.004, 'fbs': 0.2,
+    'restecg': 0.25, 'thalach': -0.025, 'exang': 1.0, 'oldpeak': 0.6, 'slope': 0.5,
+    'ca': 0.8, 'thal': 0.7,
+}
+
+
+def make_heart_data(n_rows, seed=42, with_target=True):
+    """Seeded synthetic patients in the heart.csv schema, with compact dtypes"""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for col in FEATURE_COLUMNS:
+        if col in CATEGORY_PROBABILITIES:
+            probabilities = CATEGORY_PROBABILITIES[col]
+            columns[col] = rng.choice(len(probabilities), size=n_rows, p=probabilities).astype(np.int8)
+        elif col in VITALS:
+            mean, std, low, high = VITALS[col]
+            columns[col] = np.clip(np.rint(rng.normal(mean, std, n_rows)), low, high).astype(np.float32)
+        else:
+            columns[col] = np.clip(np.round(rng.exponential(1.04, n_rows), 1), 0, 6.2).astype(np.float32)
+    data = pd.DataFrame(columns)
+    if with_target:
+        logits = np.zeros(n_rows, dtype=np.float32)
+        for col, weight in TARGET_WEIGHTS.items():
+            values = data[col].to_numpy(dtype=np.float32)
+            logits += weight * (values - values.mean())
+        data[TARGET_COLUMN] = (rng.random(n_rows, dtype=np.float32) < 1 / (1 + np.exp(-logits))).astype(
+            COMPACT_DTYPES[TARGET_COLUMN])
+    return data
+
+
+def write_heart_csv(path, n_rows, seed=42, with_target=True, chunksize=1_000_000):
+    """Write n_rows synthetic patients to CSV in chunks so 1e7 rows never sit in memory at once"""
+    written = 0
+    chunk_index = 0
+    while written < n_rows or chunk_index == 0:
+        rows = min(chunksize, n_rows - written)
+        chunk = make_heart_data(rows, seed + chunk_index, with_target)
+        chunk.to_csv(path, mode='w' if chunk_index == 0 else 'a', header=chunk_index == 0, index=False,
+                     float_format='%g')
+        written += rows
+        chunk_index += 1
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate synthetic heart-disease patients')
+    parser.add_argument('output')
+    parser.add_argument('--rows', type=float, default=1e5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-target', action='store_true')
+    args = parser.parse_args()
+    write_heart_csv(args.output, int(args.rows), args.seed, not args.no_target)
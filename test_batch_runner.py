@@ -0,0 +1,83 @@
+# test_batch_runner.py
+import pandas as pd
+import pytest
+
+from batch_runner import MANIFEST_NAME, Manifest, run_batch
+from schema import FEATURE_COLUMNS
+from streaming import score_csv
+from synthetic import make_heart_data
+
+SHARD_BYTES = 4096
+
+
+def write_patients(path, n_rows, seed=0, blank_every=0):
+    lines = make_heart_data(n_rows, seed)[FEATURE_COLUMNS].to_csv(index=False).splitlines(keepends=True)
+    if blank_every:
+        # Empty, whitespace-only and CRLF-blank lines, all skipped by read_csv
+        blanks = ['\n', '   \n', '\t\n', '\r\n']
+        lines = [line + (blanks[i % len(blanks)] if i and i % blank_every == 0 else '')
+                 for i, line in enumerate(lines)]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(''.join(lines))
+    return path
+
+
+def streamed(path, tmp_path):
+    output = tmp_path / f"streamed-{path.stem}.csv"
+    score_csv(path, output)
+    return output.read_bytes()
+
+
+def test_matches_streaming_with_blank_lines(tmp_path):
+    source = write_patients(tmp_path / 'in' / 'clinic.csv', 2000, blank_every=7)
+    summary = run_batch([source], tmp_path / 'out', n_workers=2, shard_bytes=SHARD_BYTES)
+    output = summary['files'][str(source.resolve())]['output']
+    assert summary['files'][str(source.resolve())]['shards'] > 1
+    assert open(output, 'rb').read() == streamed(source, tmp_path)
+
+
+def test_inputs_sharing_a_stem_get_separate_outputs(tmp_path):
+    first = write_patients(tmp_path / 'a' / 'clinic.csv', 300, seed=1)
+    second = write_patients(tmp_path / 'b' / 'clinic.csv', 500, seed=2)
+    summary = run_batch([first, second], tmp_path / 'out', n_workers=1, shard_bytes=SHARD_BYTES)
+    outputs = [summary['files'][str(path.resolve())]['output'] for path in (first, second)]
+    assert len(set(outputs)) == 2
+    for path, output in zip((first, second), outputs):
+        assert open(output, 'rb').read() == streamed(path, tmp_path)
+
+
+def test_resume_skips_finished_shards(tmp_path):
+    source = write_patients(tmp_path / 'in' / 'clinic.csv', 2000)
+    output_dir = tmp_path / 'out'
+    finished = []
+
+    def stop_after_three(entry, shard):
+        finished.append(shard['index'])
+        if len(finished) == 3:
+            raise RuntimeError("stopped")
+
+    with pytest.raises(RuntimeError, match="stopped"):
+        run_batch([source], output_dir, n_workers=1, shard_bytes=SHARD_BYTES, on_shard=stop_after_three)
+    entry = Manifest(output_dir).files[str(source.resolve())]
+    done = {shard['index'] for shard in entry['shards'] if shard['done']}
+    assert done == set(finished)
+
+    rescored = []
+    summary = run_batch([source], output_dir, n_workers=1, shard_bytes=SHARD_BYTES,
+                        on_shard=lambda entry, shard: rescored.append(shard['index']))
+    assert not done & set(rescored)
+    assert len(done) + len(rescored) == len(entry['shards'])
+    assert summary['scored'] == 2000
+    output = summary['files'][str(source.resolve())]['output']
+    assert open(output, 'rb').read() == streamed(source, tmp_path)
+
+
+def test_changed_input_is_replanned(tmp_path):
+    source = write_patients(tmp_path / 'in' / 'clinic.csv', 300, seed=3)
+    output_dir = tmp_path / 'out'
+    run_batch([source], output_dir, n_workers=1, shard_bytes=SHARD_BYTES)
+    write_patients(source, 400, seed=4)
+    summary = run_batch([source], output_dir, n_workers=1, shard_bytes=SHARD_BYTES)
+    assert summary['rows_scored_this_run'] == 400
+    assert len(pd.read_csv(summary['files'][str(source.resolve())]['output'])) == 400
+    assert (output_dir / MANIFEST_NAME).exists()
@@ -0,0 +1,44 @@
+# test_benchmarks.py
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from benchmarks import APP_PATH, app_mode_imports
+
+ROOT = Path(__file__).resolve().parent
+# Repository modules in sys.modules after running a snippet in a fresh interpreter
+LOCAL_MODULES = f"""
+import json, sys
+print(json.dumps(sorted(name for name, module in list(sys.modules.items())
+                        if str(getattr(module, '__file__', None) or '').startswith({str(ROOT)!r}))))
+"""
+RUN_MODE = """
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120).run()
+option = next(o for o in at.radio[0].options if o.split(' ', 1)[-1].lower() == {mode!r})
+at.radio[0].set_value(option).run()
+"""
+
+
+def local_modules(snippet):
+    output = subprocess.run([sys.executable, '-c', snippet + LOCAL_MODULES], capture_output=True, text=True,
+                            check=True, cwd=ROOT).stdout
+    return set(json.loads(output.splitlines()[-1]))
+
+
+def test_every_input_mode_is_profiled():
+    modes = app_mode_imports()
+    assert {'manual input', 'upload csv file', 'batch processing'} <= set(modes)
+    assert {'export', 'explain', 'streaming'} <= set(modes['upload csv file'])
+
+
+@pytest.mark.parametrize('mode', ['manual input', 'upload csv file', 'batch processing'])
+def test_profile_covers_what_the_app_loads(mode):
+    pytest.importorskip('streamlit.testing.v1')
+    profiled = local_modules(''.join(f'import {module}\n' for module in app_mode_imports()[mode]))
+    loaded = local_modules(RUN_MODE.format(app=str(APP_PATH), mode=mode))
+    # AppTest runs app.py itself as __main__
+    assert loaded - {'app', '__main__'} <= profiled
@@ -0,0 +1,34 @@
+# test_compiled.py
+import numpy as np
+import pytest
+
+from compiled import CompiledModel, compile_artifact, export_artifact
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(50, 20, size=(2000, 13))
+    y = (X[:, 0] + X[:, 3] - X[:, 7] + rng.normal(0, 20, 2000) > 50).astype(int)
+    return X, y
+
+
+def sklearn_proba(artifact, X):
+    for step in artifact[:-1]:
+        X = step.transform(X)
+    return artifact[-1].predict_proba(X)[:, 1]
+
+
+def test_compiled_matches_sklearn(data, fit_artifact, artifact_case):
+    X, y = data
+    artifact = fit_artifact(artifact_case, X, y)
+    compiled = compile_artifact(artifact)
+    np.testing.assert_allclose(compiled.predict_proba(X)[:, 1], sklearn_proba(artifact, X), atol=1e-9)
+
+
+def test_npz_round_trip(data, fit_artifact, tmp_path):
+    X, y = data
+    artifact = fit_artifact('scale_without_mean', X, y)
+    path = export_artifact(artifact, tmp_path / 'model.npz')
+    np.testing.assert_allclose(CompiledModel.load(path).predict_proba(X)[:, 1], sklearn_proba(artifact, X),
+                               atol=1e-9)
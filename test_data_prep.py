@@ -0,0 +1,33 @@
+# test_data_prep.py
+import numpy as np
+import pytest
+
+from data_prep import scale_features
+from stage_cache import StageCache
+
+
+def float32_split(seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(50, 20, (5000, 13)).astype(np.float32), rng.normal(50, 20, (1000, 13)).astype(np.float32)
+
+
+def test_low_memory_matches_default():
+    X_train, X_test = float32_split()
+    expected_train, expected_test, _ = scale_features(X_train.astype(np.float64), X_test.astype(np.float64))
+    scaled_train, scaled_test, _ = scale_features(X_train, X_test, low_memory=True)
+    assert scaled_train.dtype == np.float32
+    np.testing.assert_allclose(scaled_train, expected_train, atol=1e-5)
+    np.testing.assert_allclose(scaled_test, expected_test, atol=1e-5)
+
+
+@pytest.mark.parametrize('runs', [1, 2], ids=['cache_miss', 'cache_hit'])
+def test_low_memory_scales_in_place_with_cache(tmp_path, runs):
+    cache = StageCache(tmp_path)
+    for _ in range(runs):
+        X_train, X_test = float32_split()
+        scaled_train, scaled_test, _ = scale_features(X_train, X_test, cache=cache, low_memory=True)
+        # Same side effect and same returned objects whether or not the cache answered
+        assert scaled_train is X_train and scaled_test is X_test
+    assert cache.hits == runs - 1
+    expected_train, _, _ = scale_features(*float32_split(), low_memory=True)
+    np.testing.assert_array_equal(X_train, expected_train)
@@ -0,0 +1,86 @@
+# test_explain.py
+import joblib
+import numpy as np
+import pytest
+from sklearn.decomposition import PCA
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from compiled import CompiledScorer, export_artifact
+from explain import UNIT_RISK, ExplanationUnavailable, top_factors
+from schema import FEATURE_COLUMNS
+from scoring import MAX_SCORE, risk_scores
+from serving import ModelScorer, RuleScorer
+from synthetic import make_heart_data
+
+
+@pytest.fixture(scope='module')
+def data():
+    df = make_heart_data(3000, 0)
+    return df, df[FEATURE_COLUMNS].to_numpy(dtype=np.float64), df['target'].to_numpy()
+
+
+def explained_output(artifact, X, unit):
+    for step in artifact[:-1]:
+        X = step.transform(X)
+    if unit == UNIT_RISK:
+        return artifact[-1].predict_proba(X)[:, 1] * 100
+    return artifact[-1].decision_function(X)
+
+
+def test_rule_contributions_sum_to_score(data):
+    df, _, _ = data
+    attribution = RuleScorer().explain(df)
+    assert attribution.unit == UNIT_RISK
+    assert attribution.contributions.shape == (len(df), len(FEATURE_COLUMNS))
+    np.testing.assert_allclose(attribution.totals(), risk_scores(df) * (100 / MAX_SCORE), atol=1e-9)
+
+
+@pytest.mark.parametrize('engine', ['model', 'compiled'])
+def test_base_plus_contributions_is_output(data, fit_artifact, artifact_case, tmp_path, engine):
+    df, X, y = data
+    artifact = fit_artifact(artifact_case, X, y)
+    if engine == 'model':
+        path = tmp_path / 'model.pkl'
+        joblib.dump(artifact, path)
+        scorer = ModelScorer(artifact, path)
+    else:
+        scorer = CompiledScorer(export_artifact(artifact, tmp_path / 'model.npz'))
+    attribution = scorer.explain(df)
+    assert attribution.contributions.shape == (len(df), len(FEATURE_COLUMNS))
+    np.testing.assert_allclose(attribution.totals(), explained_output(artifact, X, attribution.unit), atol=1e-6)
+
+
+def test_selected_out_features_contribute_nothing(data, fit_artifact, tmp_path):
+    df, X, y = data
+    artifact = fit_artifact('select_forest', X, y)
+    joblib.dump(artifact, tmp_path / 'model.pkl')
+    contributions = ModelScorer(artifact, tmp_path / 'model.pkl').explain(df).contributions
+    dropped = ~artifact[1].get_support()
+    assert not contributions[:, dropped].any()
+
+
+def test_top_factors_are_largest_contributions(data):
+    df, _, _ = data
+    attribution = RuleScorer().explain(df)
+    factors = top_factors(attribution, 3)
+    magnitudes = np.sort(np.abs(attribution.contributions), axis=1)[:, ::-1][:, :3]
+    for i in range(3):
+        np.testing.assert_array_equal(np.abs(factors[f'Top_Effect_{i + 1}']), np.round(magnitudes[:, i], 2))
+    # A feature that contributed nothing is left unnamed
+    assert (factors['Top_Factor_3'][factors['Top_Effect_3'] == 0] == '').all()
+
+
+@pytest.mark.parametrize('artifact', [
+    (StandardScaler(), PCA(n_components=5), RandomForestClassifier(n_estimators=5, random_state=0)),
+    (StandardScaler(), SVC()),
+], ids=['forest_over_pca', 'kernel_svm'])
+def test_unexplainable_models_raise_explanation_unavailable(data, tmp_path, artifact):
+    df, X, y = data
+    for step in artifact[:-1]:
+        X = step.fit_transform(X, y)
+    artifact[-1].fit(X[:500], y[:500])
+    joblib.dump(artifact, tmp_path / 'model.pkl')
+    with pytest.raises(ExplanationUnavailable):
+        ModelScorer(artifact, tmp_path / 'model.pkl').explain(df)
@@ -0,0 +1,73 @@
+# test_features.py
+import numpy as np
+import pytest
+from sklearn.decomposition import PCA
+from sklearn.feature_selection import SelectKBest, f_classif
+
+from features import (RankedSelector, apply_pca, components_for_variance, explained_variance_curve, fit_pca,
+                      rank_features, select_features)
+
+
+@pytest.fixture(scope='module')
+def wide_spread():
+    # Column variances differ, so each component explains a distinct share
+    return np.random.default_rng(0).normal(size=(3000, 13)) * np.arange(1, 14)
+
+
+def test_variance_target_matches_sklearn(wide_spread):
+    curve = explained_variance_curve(PCA().fit(wide_spread))
+    # Thresholds exactly on the curve as well as between its points
+    for threshold in [curve[3], curve[6], 0.5, 0.95]:
+        expected = PCA(n_components=float(threshold), svd_solver='full').fit(wide_spread).n_components_
+        assert components_for_variance(curve, threshold) == expected
+
+
+@pytest.mark.parametrize('batch_size', [1000, 1002, 2998, 4])
+def test_incremental_fit_sees_every_row(wide_spread, batch_size):
+    pca = fit_pca(wide_spread, 5, 'incremental', batch_size=batch_size)
+    assert pca.n_samples_seen_ == len(wide_spread)
+
+
+@pytest.mark.parametrize('n_components', ['mle', 0.9])
+def test_incremental_rejects_non_counts(wide_spread, n_components):
+    with pytest.raises(ValueError, match='whole number of components'):
+        fit_pca(wide_spread, n_components, 'incremental')
+
+
+@pytest.mark.parametrize('n_components', [None, 'mle', 0.9, 5])
+def test_apply_pca_accepts_every_n_components(wide_spread, n_components):
+    X_train, X_test, pca = apply_pca(wide_spread, wide_spread[:10], n_components, solver='full')
+    expected = PCA(n_components=n_components, svd_solver='full').fit(wide_spread).n_components_
+    assert pca.n_components_ == expected
+    assert X_train.shape == (len(wide_spread), expected)
+    assert X_test.shape == (10, expected)
+
+
+@pytest.fixture(scope='module')
+def labelled(wide_spread):
+    y = (wide_spread[:, 0] + wide_spread[:, 5] > 0).astype(int)
+    return np.abs(wide_spread), y
+
+
+@pytest.mark.parametrize('k', [13, 20, 'all'])
+def test_ranked_selector_keeps_every_feature_for_large_k(labelled, k):
+    X, y = labelled
+    scores = rank_features(X, y, 'chi2').scores
+    assert RankedSelector(scores, k).fit(X, y).get_support().all()
+    assert len(rank_features(X, y, 'chi2').top(k)) == X.shape[1]
+
+
+@pytest.mark.parametrize('method', ['f_classif', 'chi2', 'random_forest'])
+@pytest.mark.parametrize('k', [13, 20, 'all'])
+def test_select_features_with_large_k(labelled, method, k):
+    X, y = labelled
+    X_train, X_test, _ = select_features(X, y, X[:10], k, method=method)
+    assert X_train.shape == X.shape
+    assert X_test.shape == (10, X.shape[1])
+
+
+def test_ranked_selector_matches_select_k_best(labelled):
+    X, y = labelled
+    expected = SelectKBest(f_classif, k=4).fit(X, y).get_support()
+    np.testing.assert_array_equal(RankedSelector(rank_features(X, y).scores, 4).fit(X, y).get_support(),
+                                  expected)
@@ -0,0 +1,59 @@
+# test_instrumentation.py
+import threading
+
+import numpy as np
+import pytest
+
+from instrumentation import StageStats, recording, reset, snapshot, span
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    reset()
+    yield
+    reset()
+
+
+def test_max_covers_every_call():
+    stats = StageStats()
+    stats.record(5.0)
+    for _ in range(2000):
+        stats.record(0.001)
+    assert stats.as_dict()['max_s'] == 5.0
+
+
+def test_nested_peak_reaches_outer_span():
+    with recording(memory=True):
+        with span('outer'):
+            with span('inner'):
+                block = np.ones(1_000_000)
+                del block
+    stages = snapshot()
+    assert stages['inner']['peak_bytes'] >= 8_000_000
+    assert stages['outer']['peak_bytes'] >= stages['inner']['peak_bytes']
+
+
+def test_overlapping_threads_record_no_peak():
+    started, release = threading.Event(), threading.Event()
+
+    def background():
+        with span('background'):
+            started.set()
+            release.wait()
+
+    with recording(memory=True):
+        thread = threading.Thread(target=background)
+        thread.start()
+        started.wait()
+        with span('foreground'):
+            block = np.ones(1_000_000)
+            del block
+        release.set()
+        thread.join()
+        with span('alone'):
+            block = np.ones(1_000_000)
+            del block
+    stages = snapshot()
+    assert stages['foreground']['peak_bytes'] == 0
+    assert stages['background']['peak_bytes'] == 0
+    assert stages['alone']['peak_bytes'] >= 8_000_000
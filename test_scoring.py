@@ -0,0 +1,72 @@
+# test_scoring.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from schema import FEATURE_COLUMNS
+from scoring import (HIGH_RISK_RECOMMENDATION, LOW_RISK_RECOMMENDATION, SCORE_TABLES, predict_arrays,
+                     predict_batch, predict_risk)
+
+# Every threshold in SCORE_TABLES plus values just either side of it
+EDGE_VALUES = {
+    name: sorted({value for edge in table[1] for value in (edge - 0.5, edge, edge + 0.5)})
+    for name, (kind, *table) in SCORE_TABLES.items() if kind != 'equal'
+}
+
+
+def random_patients(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, (kind, *table) in SCORE_TABLES.items():
+        if kind == 'equal':
+            columns[name] = rng.integers(0, max(table[0]) + 2, n_rows)
+        else:
+            columns[name] = rng.choice(EDGE_VALUES[name] + [0.0, 75.0, 300.0], n_rows)
+    return pd.DataFrame(columns)[FEATURE_COLUMNS]
+
+
+def expected(df):
+    rows = [predict_risk(row) for row in df[FEATURE_COLUMNS].itertuples(index=False)]
+    return np.array([pred for pred, _ in rows]), np.array([prob for _, prob in rows], dtype=np.float64)
+
+
+def test_predict_arrays_matches_predict_risk_on_random_rows():
+    df = random_patients(5000)
+    classes, probabilities, recommendations = predict_arrays(df)
+    expected_classes, expected_probabilities = expected(df)
+    np.testing.assert_array_equal(classes, expected_classes)
+    np.testing.assert_array_equal(probabilities, expected_probabilities)
+    np.testing.assert_array_equal(recommendations == HIGH_RISK_RECOMMENDATION, expected_classes == 1)
+
+
+@pytest.mark.parametrize('name', sorted(EDGE_VALUES))
+def test_bin_edges(name):
+    df = pd.DataFrame({col: np.zeros(len(EDGE_VALUES[name])) for col in FEATURE_COLUMNS})
+    df[name] = EDGE_VALUES[name]
+    np.testing.assert_array_equal(predict_arrays(df)[1], expected(df)[1])
+
+
+def test_nan_scores_nothing():
+    df = random_patients(200, seed=1).astype(np.float64)
+    df.loc[::3, 'oldpeak'] = np.nan
+    df.loc[1::3, 'chol'] = np.nan
+    np.testing.assert_array_equal(predict_arrays(df)[1], expected(df)[1])
+
+
+def test_float32_input_matches_float64():
+    df = random_patients(5000, seed=2).astype(np.float64)
+    classes, probabilities, _ = predict_arrays(df)
+    classes32, probabilities32, _ = predict_arrays(df.astype(np.float32))
+    np.testing.assert_array_equal(classes32, classes)
+    np.testing.assert_array_equal(probabilities32, probabilities)
+
+
+def test_predict_batch_frame():
+    df = random_patients(1000, seed=3)
+    results = predict_batch(df)
+    expected_classes, expected_probabilities = expected(df)
+    assert results.columns.tolist() == ['Patient_ID', 'Risk_Probability', 'Risk_Class', 'Recommendation']
+    np.testing.assert_array_equal(results['Patient_ID'], np.arange(1, len(df) + 1))
+    np.testing.assert_array_equal(results['Risk_Probability'], [round(p, 2) for p in expected_probabilities])
+    np.testing.assert_array_equal(results['Risk_Class'] == 'High Risk', expected_classes == 1)
+    np.testing.assert_array_equal(results['Recommendation'] == LOW_RISK_RECOMMENDATION, expected_classes == 0)
@@ -0,0 +1,118 @@
+# test_service.py
+import http.client
+import json
+import threading
+
+import pytest
+
+from schema import FEATURE_COLUMNS
+from service import InProcessClient, ScoringService, make_server
+from serving import RuleScorer
+
+PATIENT = {'age': 63, 'sex': 1, 'cp': 3, 'trestbps': 145, 'chol': 233, 'fbs': 1, 'restecg': 0, 'thalach': 150,
+           'exang': 0, 'oldpeak': 2.3, 'slope': 0, 'ca': 0, 'thal': 1}
+
+
+class FailingScorer(RuleScorer):
+    name = 'failing'
+
+    def __init__(self, error):
+        self.error = error
+
+    def predict(self, df):
+        raise self.error
+
+
+@pytest.fixture
+def service_for():
+    services = []
+
+    def build(scorer):
+        services.append(ScoringService(scorer, window_ms=1))
+        return services[-1]
+
+    yield build
+    for service in services:
+        service.close()
+
+
+def patients_csv(*patients):
+    rows = [','.join(str(patient[col]) for col in FEATURE_COLUMNS) for patient in patients]
+    return '\n'.join([','.join(FEATURE_COLUMNS), *rows]) + '\n'
+
+
+def test_predict(service_for):
+    response = InProcessClient(service_for(RuleScorer())).post('/predict', PATIENT)
+    assert response.status_code == 200
+    assert set(response.json()) == {'Risk_Probability', 'Risk_Class', 'Recommendation'}
+
+
+@pytest.mark.parametrize('path, kwargs', [
+    ('/predict', {'data': b'{not json'}),
+    ('/predict', {'data': b'\xff\xfe'}),
+    ('/predict', {'json_body': {'age': 63}}),
+    ('/predict/batch', {'data': 'age,sex\n"unterminated', 'content_type': 'text/csv'}),
+    ('/predict/batch', {'data': b'', 'content_type': 'text/csv'}),
+    ('/predict/batch', {'json_body': {'patients': 'nope'}}),
+])
+def test_client_errors_are_400(service_for, path, kwargs):
+    response = InProcessClient(service_for(RuleScorer())).post(path, **kwargs)
+    assert response.status_code == 400
+    assert response.json()['error']
+
+
+@pytest.mark.parametrize('error', [RuntimeError('model exploded'), ValueError('bad internal state')])
+@pytest.mark.parametrize('path', ['/predict', '/predict/batch'])
+def test_scorer_errors_are_500(service_for, error, path):
+    body = PATIENT if path == '/predict' else [PATIENT]
+    response = InProcessClient(service_for(FailingScorer(error))).post(path, body)
+    assert response.status_code == 500
+    assert response.json() == {'error': 'Internal error while scoring'}
+
+
+def test_live_server_answers_scorer_errors(service_for):
+    server = make_server(service_for(FailingScorer(RuntimeError('model exploded'))), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+        connection.request('POST', '/predict/batch', patients_csv(PATIENT), {'Content-Type': 'text/csv'})
+        response = connection.getresponse()
+        assert response.status == 500
+        assert json.loads(response.read())['error']
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_predict_rejects_invalid_values(service_for):
+    patient = dict(PATIENT, cp=7, chol=-5)
+    response = InProcessClient(service_for(RuleScorer())).post('/predict', patient)
+    assert response.status_code == 400
+    assert response.json()['errors'] == [
+        {'Patient_ID': 1, 'column': 'chol', 'value': -5.0, 'error': 'out of range'},
+        {'Patient_ID': 1, 'column': 'cp', 'value': 7.0, 'error': 'not a valid code'},
+    ]
+
+
+def test_batch_errors_name_the_rows(service_for):
+    client = InProcessClient(service_for(RuleScorer()))
+    response = client.post('/predict/batch', [PATIENT, dict(PATIENT, age=400), PATIENT])
+    assert response.status_code == 400
+    assert response.json()['errors'] == [{'Patient_ID': 2, 'column': 'age', 'value': 400.0, 'error': 'out of range'}]
+
+    csv = patients_csv(PATIENT, PATIENT, dict(PATIENT, thal='x', oldpeak=''))
+    response = client.post('/predict/batch', data=csv, content_type='text/csv')
+    assert response.status_code == 400
+    assert response.json()['errors'] == [
+        {'Patient_ID': 3, 'column': 'oldpeak', 'value': None, 'error': 'missing value'},
+        {'Patient_ID': 3, 'column': 'thal', 'value': None, 'error': 'not a number'},
+    ]
+
+
+def test_valid_csv_batch_is_scored(service_for):
+    response = InProcessClient(service_for(RuleScorer())).post('/predict/batch', data=patients_csv(PATIENT, PATIENT),
+                                                               content_type='text/csv')
+    assert response.status_code == 200
+    assert response.text.splitlines()[0] == 'Patient_ID,Risk_Probability,Risk_Class,Recommendation'
+    assert len(response.text.splitlines()) == 3
@@ -1,19 +1,87 @@
 # train_save.py
+import time
+from collections.abc import Mapping
+
 import joblib
-from sklearn.model_selection import GridSearchCV
+from sklearn.base import clone
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (GridSearchCV, HalvingGridSearchCV, HalvingRandomSearchCV,
+                                     ParameterGrid, RandomizedSearchCV)
 from sklearn.metrics import accuracy_score
 
-def tune_and_train(model, X_train, y_train, param_grid):
-    grid = GridSearchCV(model, param_grid, cv=5)
+from instrumentation import instrumented
+
+SEARCH_STRATEGIES = ('grid', 'halving', 'random', 'halving_random')
+
+def make_search(model, param_grid, strategy='grid', cv=5, n_jobs=None, n_iter=10, random_state=42, factor=3):
+    # n_jobs parallelises over every (candidate, fold) fit; -1 uses all cores.
+    # The halving strategies start all candidates on a small sample and keep
+    # the best 1/factor on factor times more data each round.
+    if strategy == 'grid':
+        return GridSearchCV(model, param_grid, cv=cv, n_jobs=n_jobs)
+    if strategy == 'halving':
+        return HalvingGridSearchCV(model, param_grid, cv=cv, n_jobs=n_jobs, factor=factor,
+                                   random_state=random_state)
+    grids = [param_grid] if isinstance(param_grid, Mapping) else param_grid
+    if all(hasattr(values, '__len__') for grid in grids for values in grid.values()):
+        # Sampling more candidates than the grid holds only triggers a warning
+        n_iter = min(n_iter, len(ParameterGrid(param_grid)))
+    if strategy == 'random':
+        return RandomizedSearchCV(model, param_grid, n_iter=n_iter, cv=cv, n_jobs=n_jobs,
+                                  random_state=random_state)
+    if strategy == 'halving_random':
+        return HalvingRandomSearchCV(model, param_grid, n_candidates=n_iter, cv=cv, n_jobs=n_jobs,
+                                     factor=factor, random_state=random_state)
+    raise ValueError(f"Unknown search strategy: {strategy!r} (expected one of {', '.join(SEARCH_STRATEGIES)})")
+
+@instrumented()
+def tune_and_train(model, X_train, y_train, param_grid, strategy='grid', cv=5, n_jobs=None, n_iter=10,
+                   random_state=42, checkpoint_dir=None):
+    # checkpoint_dir saves every finished fold fit, so a rerun after a crash
+    # or with an extended grid only fits what is missing (grid and random only)
+    if checkpoint_dir is not None:
+        from checkpoint import ResumableSearch
+        grid = ResumableSearch(model, param_grid, checkpoint_dir, strategy, cv=cv, n_jobs=n_jobs, n_iter=n_iter,
+                               random_state=random_state)
+        grid.fit(X_train, y_train)
+        return grid.best_estimator_, grid.best_params_
+    grid = make_search(model, param_grid, strategy, cv=cv, n_jobs=n_jobs, n_iter=n_iter,
+                       random_state=random_state)
     grid.fit(X_train, y_train)
     return grid.best_estimator_, grid.best_params_
 
+def compare_search_strategies(model, X_train, y_train, param_grid, strategies=SEARCH_STRATEGIES, cv=5,
+                              n_jobs=-1, n_iter=10, random_state=42):
+    """Run each search strategy on the same data; returns wall time, best score and fit count per strategy"""
+    results = []
+    for strategy in strategies:
+        search = make_search(clone(model), param_grid, strategy, cv=cv, n_jobs=n_jobs, n_iter=n_iter,
+                             random_state=random_state)
+        start = time.perf_counter()
+        search.fit(X_train, y_train)
+        results.append({
+            'strategy': strategy,
+            'wall_s': time.perf_counter() - start,
+            'best_score': float(search.best_score_),
+            'best_params': search.best_params_,
+            'n_fits': len(search.cv_results_['params']) * cv,
+        })
+    return results
+
+@instrumented()
 def evaluate_model(model, X_test, y_test):
     y_pred = model.predict(X_test)
     return accuracy_score(y_test, y_pred)
 
+def evaluate_all(model, X_test, y_test, n_boot=0):
+    # Every metric from one inference pass; n_boot > 0 adds bootstrap confidence intervals
+    from evaluation import Evaluation
+    return Evaluation.from_model(model, X_test, y_test).report(n_boot)
+
 def save_model(model, file_path='model.joblib'):
     joblib.dump(model, file_path)
 
-def load_model(file_path='model.joblib'):
-    return joblib.load(file_path)
+def load_model(file_path='model.joblib', mmap_mode=None):
+    # mmap_mode='r' maps large numpy arrays (e.g. forest node tables) read-only
+    # instead of copying them; it has no effect on compressed dumps
+    return joblib.load(file_path, mmap_mode=mmap_mode)
@@ -0,0 +1,116 @@
+# upload_cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def content_key(data):
+    """Content hash of an uploaded file's bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class CachedUpload:
+    """Validated upload (see ingest.py) plus its summary statistics and per-engine prediction results"""
+
+    def __init__(self, ingested):
+        self.frame = ingested.frame
+        self.missing_cols = ingested.missing_columns
+        self.errors = ingested.errors
+        self.n_rows = ingested.n_rows
+        self.stats = {} if self.missing_cols or self.frame.empty else summarize(self.frame)
+        self.results = {}
+        self.nbytes = frame_bytes(self.frame) + frame_bytes(self.errors)
+
+
+def summarize(df):
+    males = int(df['sex'].sum())
+    return {
+        'patients': len(df),
+        'mean_age': float(df['age'].mean()),
+        'mean_chol': float(df['chol'].mean()),
+        'males': males,
+        'females': len(df) - males,
+    }
+
+
+def summarize_results(results_df):
+    high_risk = int((results_df['Risk_Class'] == 'High Risk').sum())
+    return {
+        'risk_distribution': results_df['Risk_Class'].value_counts(),
+        'high_risk': high_risk,
+        'low_risk': len(results_df) - high_risk,
+    }
+
+
+class UploadCache:
+    """Memory-bounded LRU of uploads keyed by content hash, shared by every session in the process"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def nbytes(self):
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def get_upload(self, key, parse):
+        """Return the CachedUpload for key, calling parse() to ingest the file on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        # Parse outside the lock so other sessions are not blocked behind a large file
+        entry = CachedUpload(parse())
+        with self._lock:
+            self.misses += 1
+            entry = self._entries.setdefault(key, entry)
+            self._entries.move_to_end(key)
+            self._evict()
+        return entry
+
+    def get_results(self, key, engine_version, compute):
+        """Return (results, summary, seconds) for an upload and engine version, calling compute() once"""
+        with self._lock:
+            entry = self._entries.get(key)
+            cached = entry.results.get(engine_version) if entry is not None else None
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+        start = time.perf_counter()
+        results = compute()
+        cached = (results, summarize_results(results), time.perf_counter() - start)
+        with self._lock:
+            self.misses += 1
+            if entry is not None and key in self._entries:
+                entry.results[engine_version] = cached
+                entry.nbytes += frame_bytes(results)
+                self._entries.move_to_end(key)
+                self._evict()
+        return cached
+
+    def _evict(self):
+        # Always keep the most recent entry, even if it alone exceeds the budget
+        while len(self._entries) > 1 and self.nbytes > self.max_bytes:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.nbytes, 'hits': self.hits, 'misses': self.misses}
+
+
+def parse_csv(data):
+    from ingest import ingest_csv
+    return ingest_csv(data)